@@ -1,30 +1,14 @@
 import streamlit as st
 import os
-from io import BytesIO
-import zipfile
-from PIL import Image, ImageOps, ImageFilter
-import base64
-import platform
-
-# PDF Libraries
-from PyPDF2 import PdfReader, PdfWriter
-
-# PPT Libraries
-from pptx import Presentation
-
-# Jupyter Notebook Libraries
-import nbformat
-from nbconvert import HTMLExporter
-import pdfkit # UPDATED: Switched to pdfkit
-
-# PDF to Image
-try:
-    from pdf2image import convert_from_bytes
-    HAS_PDF2IMAGE = True
-except ImportError:
-    HAS_PDF2IMAGE = False
-except Exception:
-    HAS_PDF2IMAGE = False
+import tempfile
+
+# Processing engine (no Streamlit dependency). Only the app shell is imported here; each tool
+# imports its engine functions (Pillow, PyPDF2, nbconvert...) on first use, see PRELOAD.
+from engine import (
+    cache_key, get_result_cache, DocumentStore, upload_id, image_cost, get_renderer,
+    get_job_queue, ACTIVE_STATES, get_metrics, serve_metrics, track, record, PHASES, admit, LIMITS, SESSION_JOBS,
+    get_thumbnail_index, POPPLER_MISSING, get_preloader, get_artifact_store,
+)
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -37,11 +21,57 @@ st.set_page_config(
 # --- 2. SESSION STATE ---
 if 'current_tool' not in st.session_state:
     st.session_state['current_tool'] = "Compress Docs"
+# Parsed PDFs / decoded images survive reruns until the upload changes
+if 'doc_store' not in st.session_state:
+    st.session_state['doc_store'] = DocumentStore()
 
 # Path to local logo (fallback to remote if not found)
 LOCAL_LOGO_PATH = "/mnt/data/ee0a0a38-adb8-4836-9e16-1632d846a6d9.png"
 REMOTE_LOGO_URL = "https://github.com/nitesh4004/Ni30-pdflover/blob/main/docmint.png?raw=true"
 
+# Shared by every session in this process (memory LRU + on-disk tier)
+RESULT_CACHE = get_result_cache()
+
+# Finished outputs live on disk and are passed around by id; downloads read them only when clicked
+ARTIFACTS = get_artifact_store()
+
+# Long-running tools run here instead of blocking the script; job ids are kept in the URL
+JOBS = get_job_queue()
+
+# Per-operation telemetry; with DOCMINT_METRICS_PORT set it is also served for Prometheus (on DOCMINT_METRICS_HOST)
+METRICS = get_metrics()
+METRICS.register("result_cache", RESULT_CACHE.stats)
+METRICS.register("jobs", JOBS.stats)
+METRICS.register("artifacts", ARTIFACTS.stats)
+METRICS.register("renderer", lambda: get_renderer().stats())
+METRICS.register("thumbnails", lambda: THUMBS.stats())
+METRICS.register("imports", lambda: PRELOAD.stats())
+if os.environ.get("DOCMINT_METRICS_PORT"): serve_metrics(int(os.environ["DOCMINT_METRICS_PORT"]))
+
+# Page thumbnails (poppler), cached on disk per document hash and shared by every session
+THUMBS = get_thumbnail_index()
+THUMBS_PER_VIEW = 24
+THUMB_COLUMNS = 6
+
+# Tool modules are imported when a tool is first opened (timed per tool) and stay loaded for the process
+PRELOAD = get_preloader()
+TOOL_PRELOADS = {
+    "Compress Docs": ("compress_image", "batch", "compress_pdf"),
+    "Notebook to PDF": ("notebook_to_pdf",),
+    "Convert Format": ("convert", "batch"),
+    "JPG to PDF": ("images_to_pdf",),
+    "Resize Image": ("resize", "batch"),
+    "Image Editor": ("edit", "batch"),
+    "Merge PDF": ("merge",),
+    "Split PDF": ("split",),
+    "Merge PPTX": ("merge_pptx",),
+}
+
+# Merges above this combined upload size default to the disk-backed writer
+LOW_MEMORY_MERGE_BYTES = 50 * 1024 * 1024
+# The streaming PDF writer (low-memory merge, organize, split) copies pages only
+STREAMED_PDF_NOTE = "Bookmarks, form fields and named destinations are not carried over."
+
 # --- 3. CUSTOM CSS ---
 st.markdown("""
 <style>
@@ -142,109 +172,252 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- 4. HELPER FUNCTIONS ---
-def create_zip(files_dict, zip_name):
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-        for file_name, data in files_dict.items():
-            zip_file.writestr(file_name, data)
-    return zip_buffer.getvalue()
-
 def get_size_format(b, factor=1024, suffix="B"):
     for unit in ["", "K", "M", "G", "T", "P"]:
         if b < factor: return f"{b:.2f} {unit}{suffix}"
         b /= factor
     return f"{b:.2f} Y{suffix}"
 
-def compress_image_to_target(img, target_kb):
-    target_bytes = target_kb * 1024
-    low, high = 1, 95
-    best_buffer = None
+def load_image(uploaded, slot):
+    """Decoded image for this upload, reused across reruns of the same tool."""
+    def load():
+        from PIL import Image
+        img = Image.open(uploaded)
+        img.load()
+        return img
+    return st.session_state['doc_store'].get(slot, upload_id(uploaded), load, image_cost)
+
+def load_preview(uploaded, slot):
+    """(preview image, original size, format) for display; the full image is only decoded on export."""
+    from engine import make_preview
+    return st.session_state['doc_store'].get(f"{slot}_preview", upload_id(uploaded), lambda: make_preview(uploaded), lambda p: image_cost(p[0]))
+
+def load_pdf(uploaded, slot):
+    """Parsed PdfReader for this upload, reused across reruns of the same tool."""
+    from engine import open_pdf
+    return st.session_state['doc_store'].get(slot, upload_id(uploaded), lambda: open_pdf(uploaded), lambda r: uploaded.size * 2)
+
+def upload_size(src):
+    return getattr(src, "size", None) or len(src)
+
+def show_profile(report):
+    if report:
+        with st.expander("Profile report"):
+            st.code(report, language="text")
+
+def cached_result(operation, inputs, params, compute):
+    """
+    (artifact id, meta) for an operation from the shared result cache; compute() runs only on a miss
+    and the id is None when it produced nothing. Tracked in METRICS.
+    """
+    computed = []
+    def run():
+        computed.append(True)
+        return compute()
+    key = cache_key(operation, inputs, params)
+    with track(operation, st.session_state.get('profile_ops', False), input_bytes=sum(upload_size(i) for i in inputs)) as op:
+        payload, meta = RESULT_CACHE.get_or_compute(key, run)
+        op.cache_hit = not computed
+        if payload is not None: record(output_bytes=len(payload))
+    show_profile(op.profile)
+    return (None if payload is None else ARTIFACTS.put(payload, key)), meta
+
+def cache_lookup(operation, key):
+    """Result cache lookup for job-backed tools, as (artifact id, meta); a hit is tracked as a cached run of the operation."""
+    entry = RESULT_CACHE.get(key)
+    if entry is None: return None
+    with track(operation) as op:
+        op.cache_hit = True
+        record(output_bytes=len(entry[0]))
+    return ARTIFACTS.put(entry[0], key), entry[1]
+
+def download_result(label, artifact, file_name, mime):
+    """Download button for a stored result: the page only carries its id, the file is read when clicked."""
+    st.download_button(label, ARTIFACTS.reader(artifact), file_name, mime, type="primary")
+
+def render_batch(operation, params, files):
+    """Run an image operation over every upload on the process pool (or as a job when large) and offer the ZIP."""
+    from engine import batch_to_zip
+    decision = admission(f"batch_{operation}", files, inline=True)
+    if decision is None: return
+    slot = f"batch_{operation}"
     
-    # 1. Optimize Quality
-    while low <= high:
-        mid = (low + high) // 2
-        buf = BytesIO()
-        if img.mode in ("RGBA", "P"): temp_img = img.convert("RGB")
-        else: temp_img = img
-        temp_img.save(buf, format="JPEG", quality=mid, optimize=True)
-        size = buf.tell()
-        
-        if size <= target_bytes:
-            best_buffer = buf
-            low = mid + 1 
+    if st.button(f"Process {len(files)} Files", type="primary", use_container_width=True):
+        if decision.action == "background":
+            submit_job(slot, "batch", [(f.name, f) for f in files], {"operation": operation, "params": params}, f"Processing {len(files)} files")
         else:
-            high = mid - 1
+            forget_job(slot)
+            progress = st.progress(0.0)
             
-    if best_buffer: return best_buffer, "Quality Optimized"
-        
-    # 2. Resize if needed
-    scale = 0.9
-    width, height = img.size
-    while scale > 0.1:
-        new_w, new_h = int(width * scale), int(height * scale)
-        buf = BytesIO()
-        if img.mode in ("RGBA", "P"): temp_img = img.convert("RGB")
-        else: temp_img = img
-        resized = temp_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-        resized.save(buf, format="JPEG", quality=50, optimize=True)
-        if buf.tell() <= target_bytes: return buf, f"Resized to {int(scale*100)}%"
-        scale -= 0.1
-    return None, "Failed"
-
-def convert_notebook_to_pdf_bytes(notebook_file):
+            def on_result(i, result):
+                name, _, _, error, _ = result
+                progress.progress((i + 1) / len(files), text=f"{i + 1}/{len(files)} · {name}{' (failed)' if error else ''}")
+            
+            fd, path = tempfile.mkstemp(suffix=".zip")
+            os.close(fd)
+            try:
+                with track(f"batch_{operation}", input_bytes=sum(f.size for f in files)):
+                    summary = batch_to_zip(operation, ((f.name, f.getvalue()) for f in files), params, path, on_result=on_result)
+                    record(output_bytes=os.path.getsize(path))
+                show_batch(operation, ARTIFACTS.put(path), summary)
+            finally:
+                os.remove(path)
+    render_batch_job(operation, files)
+
+def show_batch(operation, artifact, summary):
+    st.markdown('<div class="result-box">', unsafe_allow_html=True)
+    st.success(f"Processed {summary['done']} of {summary['done'] + len(summary['failed'])} files in {summary['seconds']:.1f}s")
+    st.caption(f"{summary['throughput']:.2f} images/s per core on {summary['workers']} workers")
+    for name, error in summary["failed"]:
+        st.warning(f"{name}: {error}")
+    if summary["done"]:
+        download_result("Download ZIP", artifact, f"docmint_{operation}.zip", "application/zip")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def render_batch_job(operation, files=()):
+    """The batch job's progress or ZIP; with no files, whichever job the URL points at."""
+    render_job(f"batch_{operation}", lambda artifact, summary: show_batch(operation, artifact, summary), files)
+
+def restore(key, value):
+    """Start a widget at value in a new session (e.g. after a reconnect), so it reopens where its job is."""
+    st.session_state.setdefault(key, value)
+
+def admission(tool, uploads, inline=False):
     """
-    Converts uploaded .ipynb file to PDF bytes using nbconvert -> HTML -> PDFKit (wkhtmltopdf).
+    Header-only admission check (engine.admit) for a tool's uploads, cached per upload.
+    Shows the reason and returns None when they are over the tool's limits; inline tools
+    say when the input is large enough to be sent to the background queue instead.
     """
-    try:
-        # 1. Read Notebook
-        notebook_content = notebook_file.read().decode('utf-8')
-        notebook = nbformat.reads(notebook_content, as_version=4)
-
-        # 2. Convert to HTML using nbconvert
-        # Using 'classic' or 'lab' template
-        html_exporter = HTMLExporter()
-        html_exporter.template_name = 'classic' 
-        (body, resources) = html_exporter.from_notebook_node(notebook)
-
-        # 3. Configure PDFKit
-        options = {
-            'page-size': 'A4',
-            'margin-top': '0.75in',
-            'margin-right': '0.75in',
-            'margin-bottom': '0.75in',
-            'margin-left': '0.75in',
-            'encoding': "UTF-8",
-            'no-outline': None,
-            'quiet': ''
-        }
-        
-        # Check system for wkhtmltopdf binary location
-        path_wkhtmltopdf = None
-        
-        # Common path for Linux/Streamlit Cloud
-        if os.path.exists('/usr/bin/wkhtmltopdf'):
-            path_wkhtmltopdf = '/usr/bin/wkhtmltopdf'
-        # Common path for Local Windows (example)
-        elif os.path.exists(r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'):
-            path_wkhtmltopdf = r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
-            
-        config = pdfkit.configuration(wkhtmltopdf=path_wkhtmltopdf) if path_wkhtmltopdf else None
-        
-        # 4. Convert HTML String to PDF
-        # If config is None, pdfkit will look in system PATH
-        if config:
-            pdf_bytes = pdfkit.from_string(body, False, options=options, configuration=config)
-        else:
-            pdf_bytes = pdfkit.from_string(body, False, options=options)
-            
-        return pdf_bytes, "Success"
+    files = uploads if isinstance(uploads, list) else [uploads]
+    decision = st.session_state['doc_store'].get(f"{tool}_admission", "|".join(upload_id(f) for f in files),
+                                                 lambda: admit(tool, [(f.name, f) for f in files]))
+    if decision.action == "reject":
+        st.error(f"⛔ {decision.reason}")
+        return None
+    if inline and decision.action == "background":
+        st.caption(f"Large input (about {decision.seconds:.0f}s of work): it will run as a background job.")
+    return decision
+
+def uploads_id(uploads):
+    """
+    Content hash of a tool's uploads, in order (hashed once per upload in this session): a job's
+    result is only shown while the same files are uploaded, including when they are uploaded again.
+    """
+    uploads = list(uploads)
+    return st.session_state['doc_store'].get("job_source", "|".join(upload_id(f) for f in uploads), lambda: cache_key("source", uploads))
+
+def submit_job(slot, operation, inputs, params=None, label="", key=None, filename=None):
+    """
+    Queue a background job for a tool. Its id goes into session state and the URL, so reruns and reconnects find it.
+    The job's meta records which uploads it belongs to and, when given, the filename to download its result as.
+    A job still running in the same slot is cancelled; a session may have at most SESSION_JOBS active jobs.
+    """
+    active = [k for k, v in st.session_state.items()
+              if k.startswith("job_") and k != f"job_{slot}" and (JOBS.status(v) or {}).get("status") in ACTIVE_STATES]
+    if len(active) >= SESSION_JOBS:
+        st.error(f"You already have {len(active)} jobs running. Wait for one to finish or cancel it first.")
+        return
+    previous = st.session_state.get(f"job_{slot}")
+    if previous: JOBS.cancel(previous)
+    meta = {"source": uploads_id(f for _, f in inputs), "filename": filename}
+    job_id = JOBS.submit(operation, inputs, params, label, cache_key=key, profile=st.session_state.get('profile_ops', False), meta=meta)
+    st.session_state[f"job_{slot}"] = job_id
+    st.query_params[f"job_{slot}"] = job_id
+
+def forget_job(slot):
+    st.session_state.pop(f"job_{slot}", None)
+    st.query_params.pop(f"job_{slot}", None)
+
+@st.fragment(run_every=1.0)
+def job_progress(slot, job_id):
+    """Polls the job once a second; only this fragment reruns until the job finishes."""
+    state = JOBS.status(job_id)
+    if state is None or state["status"] not in ACTIVE_STATES: st.rerun()
+    if state["status"] == "queued":
+        st.progress(0.0, text=f"{state['label']} · waiting for a free worker...")
+    else:
+        fraction = state["done"] / state["total"] if state["total"] else 0.0
+        step = f" · {state['done']}/{state['total']}" if state["total"] else ""
+        st.progress(fraction, text=f"{state['label']}{step} {state['message']}")
+    if st.button("Cancel", key=f"cancel_{slot}"): JOBS.cancel(job_id)
+
+def thumbnail_doc(uploaded):
+    """Id of an upload in the thumbnail index; the file is hashed once per upload."""
+    doc_id = st.session_state['doc_store'].get("thumbnails", upload_id(uploaded), lambda: THUMBS.add(uploaded))
+    if not THUMBS.has(doc_id): doc_id = THUMBS.add(uploaded)  # evicted from disk since
+    return doc_id
+
+def render_page_picker(uploaded, total):
+    """Thumbnail grid for choosing, ordering and dropping pages. Returns the zero-based pages in output order."""
+    from engine import parse_page_spec
+    doc_id = thumbnail_doc(uploaded) if THUMBS.available else None
+    if doc_id is None: st.caption(POPPLER_MISSING)
+    key = f"picked_{upload_id(uploaded)}"
+    picked = st.session_state.setdefault(key, set(range(total)))
+    
+    views = (total + THUMBS_PER_VIEW - 1) // THUMBS_PER_VIEW
+    c1, c2, c3 = st.columns([2, 1, 1])
+    view = c1.number_input(f"Thumbnail set (1-{views})", 1, max(views, 1), 1, disabled=views <= 1)
+    select = "all" if c2.button("Select all", use_container_width=True) else "none" if c3.button("Select none", use_container_width=True) else None
+    if select:
+        picked.clear()
+        if select == "all": picked.update(range(total))
+        for page in range(total): st.session_state.pop(f"{key}_{page}", None)
+    
+    # Only the visible set is rendered (in parallel); the next set is rendered in the background
+    pages = range((view - 1) * THUMBS_PER_VIEW, min(view * THUMBS_PER_VIEW, total))
+    thumbs = THUMBS.get(doc_id, pages, timeout=10) if doc_id else {}
+    if doc_id: THUMBS.request(doc_id, range(pages.stop, min(pages.stop + THUMBS_PER_VIEW, total)))
+    cols = st.columns(THUMB_COLUMNS)
+    for i, page in enumerate(pages):
+        with cols[i % THUMB_COLUMNS]:
+            if thumbs.get(page): st.image(thumbs[page])
+            if st.checkbox(f"Page {page + 1}", value=page in picked, key=f"{key}_{page}"): picked.add(page)
+            else: picked.discard(page)
+    
+    order = st.text_input("Output order (optional)", placeholder="e.g. 3,1-2,5",
+                          help="Ticked pages in the order they should appear; leave empty to keep document order")
+    if not order: return sorted(picked)
+    groups = parse_page_spec(order, total)
+    return [page for page in dict.fromkeys(p for group in groups for p in group) if page in picked]
+
+def render_image_job(slot, prefix, uploaded):
+    """Download for a single-image tool run that was sent to the background queue (uploaded may be None)."""
+    def show(artifact, meta):
+        ext = os.path.splitext(meta["name"])[1][1:].lower()
+        mime = "application/pdf" if ext == "pdf" else f"image/{'jpeg' if ext == 'jpg' else ext}"
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success(f"✅ Done! ({get_size_format(ARTIFACTS.size(artifact))})")
+        download_result("Download Result", artifact, f"{prefix}_{meta['name']}", mime)
+        st.markdown('</div>', unsafe_allow_html=True)
+    render_job(slot, show, [uploaded] if uploaded else [])
 
-    except OSError as e:
-        if "wkhtmltopdf" in str(e).lower():
-            return None, "System dependency 'wkhtmltopdf' not found. If local, install it and add to PATH. If cloud, check packages.txt."
-        return None, str(e)
-    except Exception as e:
-        return None, str(e)
+def render_job(slot, show_result, uploads=()):
+    """
+    Progress and Cancel while the tool's job runs; afterwards show_result(artifact id, meta) or the error.
+    A job started for other uploads than the current ones is cancelled and forgotten. With no uploads
+    (e.g. a reconnected browser, whose uploader comes back empty) the job in the URL is shown as is.
+    """
+    job_id = st.session_state.get(f"job_{slot}") or st.query_params.get(f"job_{slot}")
+    state = JOBS.status(job_id)
+    if state is None:
+        if job_id: forget_job(slot)  # expired
+        return
+    if uploads and state["meta"].get("source") != uploads_id(uploads):
+        if state["status"] in ACTIVE_STATES: JOBS.cancel(job_id)
+        forget_job(slot)
+        return
+    st.session_state[f"job_{slot}"] = job_id
+    if state["status"] in ACTIVE_STATES:
+        job_progress(slot, job_id)
+    elif state["status"] == "done":
+        # Linked into the artifact store under the job id, so it outlives the job directory
+        show_result(ARTIFACTS.put(JOBS.result_path(job_id), job_id), state["meta"])
+        show_profile(state.get("profile"))
+    elif state["status"] == "failed":
+        st.error(f"{state['label']} failed: {state['error']}")
+    else:
+        st.info(f"{state['label']} was cancelled.")
 
 # --- 5. SIDEBAR (Branding Only) ---
 def render_sidebar():
@@ -270,6 +443,31 @@ def render_sidebar():
             """, unsafe_allow_html=True)
         
         st.info("DocMint is your all-in-one document processing suite.")
+        stats = RESULT_CACHE.stats()
+        st.caption(f"Result cache: {stats['hits']} hits · {stats['misses']} misses · {stats['evictions'] + stats['disk_evictions']} evictions")
+        st.caption(f"Re-parses avoided this session: {st.session_state['doc_store'].counters['reused']}")
+        jobs = JOBS.stats()
+        st.caption(f"Background jobs: {jobs.get('running', 0)} running · {jobs.get('queued', 0)} queued")
+        render_metrics()
+
+def render_metrics():
+    with st.expander("Performance"):
+        st.checkbox("Profile operations", key="profile_ops", help="Run this session's operations under the profiler and show the report")
+        ops = METRICS.snapshot()["operations"]
+        if ops:
+            st.table([{
+                "Operation": name, "Runs": t["count"], "Cached": t["cache_hits"], "Avg s": f"{t['seconds'] / t['count']:.2f}",
+                **{p.title(): f"{t['phases'].get(p, 0) / t['count']:.2f}" for p in PHASES},
+                "Peak RSS": get_size_format(t["peak_rss_bytes"]),
+            } for name, t in sorted(ops.items())])
+        loads = PRELOAD.seconds
+        if loads:
+            st.caption("Tool load time (first use): " + " · ".join(f"{name} {s:.2f}s" for name, s in sorted(loads.items())))
+        st.caption("Full stats: add ?stats=json or ?stats=prometheus to the URL")
+
+def render_stats_page(fmt):
+    if fmt == "prometheus": st.code(METRICS.prometheus(), language="text")
+    else: st.json(METRICS.snapshot())
 
 # --- 6. NAVIGATION (HORIZONTAL) ---
 def render_horizontal_nav():
@@ -285,21 +483,35 @@ def render_horizontal_nav():
         "Merge PPTX"
     ]
     
-    # Using st.radio with horizontal=True for top bar navigation
-    selected = st.radio("Choose Tool", tool_options, horizontal=True, label_visibility="collapsed")
+    # Using st.radio with horizontal=True for top bar navigation; kept in the URL so a reconnect reopens it
+    if st.query_params.get("tool") in tool_options: restore("tool", st.query_params["tool"])
+    selected = st.radio("Choose Tool", tool_options, horizontal=True, label_visibility="collapsed", key="tool")
+    st.query_params["tool"] = selected
     return selected
 
 # --- 7. TOOLS ---
 def tool_compress_docs():
+    from engine import compress_image_to_target
     st.markdown("### Compress Documents")
     
-    doc_type = st.radio("Select Type", ["Image (Target Size)", "PDF (Reduce Size)"], horizontal=True)
+    types = ["Image (Target Size)", "PDF (Reduce Size)"]
+    restore("compress_type", types[1] if st.query_params.get("job_compress_pdf") else types[0])
+    doc_type = st.radio("Select Type", types, horizontal=True, key="compress_type")
     st.markdown("---")
     
     if doc_type == "Image (Target Size)":
+        restore("compress_batch", bool(st.query_params.get("job_batch_compress")))
+        if st.checkbox("Batch mode (multiple files)", key="compress_batch"):
+            files = st.file_uploader("Upload Images", type=["jpg", "png", "jpeg"], accept_multiple_files=True)
+            if files:
+                target_kb = st.number_input("Target Size per Image (KB)", min_value=10, value=200)
+                render_batch("compress", {"target_kb": target_kb}, files)
+            else:
+                render_batch_job("compress")
+            return
         uploaded = st.file_uploader("Upload Image", type=["jpg", "png", "jpeg"])
-        if uploaded:
-            img = Image.open(uploaded)
+        decision = uploaded and admission("compress_image", uploaded, inline=True)
+        if decision:
             current_kb = uploaded.size / 1024
             
             c1, c2 = st.columns(2)
@@ -308,46 +520,82 @@ def tool_compress_docs():
             target_kb = c2.number_input("Target Size (KB)", min_value=10, max_value=int(current_kb), value=int(current_kb*0.8))
             
             if st.button("Compress Now", type="primary", use_container_width=True):
-                with st.spinner("Compressing..."):
-                    res_buf, method = compress_image_to_target(img, target_kb)
-                    if res_buf:
-                        st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                        st.success(f"✅ Success! ({method})")
-                        st.download_button("Download Result", res_buf.getvalue(), f"compressed_{uploaded.name}", "image/jpeg", type="primary")
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    else:
-                        st.error("Could not reach target size.")
+                if decision.action == "background":
+                    submit_job("compress_image", "image", [(uploaded.name, uploaded)], {"operation": "compress", "params": {"target_kb": target_kb}},
+                               f"Compressing {uploaded.name}")
+                else:
+                    forget_job("compress_image")
+                    with st.spinner("Compressing..."):
+                        def compute():
+                            buf, method, encodes = compress_image_to_target(load_image(uploaded, "compress_image"), target_kb)
+                            return (buf.getbuffer() if buf else None), {"method": method, "encodes": encodes}
+                        res, meta = cached_result("compress_image", [uploaded], {"target_kb": target_kb}, compute)
+                        if res:
+                            st.markdown('<div class="result-box">', unsafe_allow_html=True)
+                            st.success(f"✅ Success! ({meta['method']})")
+                            st.caption(f"{get_size_format(ARTIFACTS.size(res))} in {meta['encodes']} encodes")
+                            download_result("Download Result", res, f"compressed_{uploaded.name}", "image/jpeg")
+                            st.markdown('</div>', unsafe_allow_html=True)
+                        else:
+                            st.error("Could not reach target size.")
+        render_image_job("compress_image", "compressed", uploaded)
                         
     else: # PDF
         uploaded = st.file_uploader("Upload PDF", type=["pdf"])
-        if uploaded:
+        
+        def show(artifact, report):
+            st.markdown('<div class="result-box">', unsafe_allow_html=True)
+            if report.get("unchanged"):
+                st.info("This PDF is already compact: compressing it would not make it smaller, so the original is returned.")
+            else:
+                st.success(f"Done! New Size: {get_size_format(ARTIFACTS.size(artifact))}")
+                st.caption(f"{report['images']} images re-encoded, {report['deduplicated']} duplicate objects merged")
+            kinds = sorted(set(report["before"]) | set(report["after"]))
+            st.table([{"Object Type": k, "Before": get_size_format(report["before"].get(k, 0)), "After": get_size_format(report["after"].get(k, 0))} for k in kinds])
+            download_result("Download PDF", artifact, report["filename"], "application/pdf")
+            st.markdown('</div>', unsafe_allow_html=True)
+        
+        if uploaded and admission("compress_pdf", uploaded):
             st.metric("Current Size", get_size_format(uploaded.size))
             level = st.select_slider("Compression Strength", options=["Low", "Medium", "High"], value="Medium")
             
+            filename = f"compressed_{uploaded.name}"
+            
             if st.button("Compress PDF", type="primary", use_container_width=True):
-                with st.spinner("Compressing..."):
-                    reader = PdfReader(uploaded)
-                    writer = PdfWriter()
-                    for page in reader.pages:
-                        if level in ["Medium", "High"]: page.compress_content_streams()
-                        writer.add_page(page)
-                    if level == "High": writer.add_metadata({})
-                    
-                    out = BytesIO()
-                    writer.write(out)
-                    
-                    st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                    st.success(f"Done! New Size: {get_size_format(out.tell())}")
-                    st.download_button("Download PDF", out.getvalue(), f"compressed_{uploaded.name}", "application/pdf", type="primary")
-                    st.markdown('</div>', unsafe_allow_html=True)
+                key = cache_key("compress_pdf", [uploaded], {"level": level})
+                hit = cache_lookup("compress_pdf", key)
+                if hit:
+                    forget_job("compress_pdf")
+                    show(hit[0], dict(hit[1], filename=filename))
+                else:
+                    submit_job("compress_pdf", "compress_pdf", [(uploaded.name, uploaded)], {"level": level}, f"Compressing {uploaded.name}", key,
+                               filename=filename)
+        render_job("compress_pdf", show, [uploaded] if uploaded else [])
 
 def tool_resize_image():
+    from engine import resize_image, make_preview
     st.markdown("### Resize Image")
+    restore("resize_batch", bool(st.query_params.get("job_batch_resize")))
+    if st.checkbox("Batch mode (multiple files)", key="resize_batch"):
+        files = st.file_uploader("Upload Images", type=["png", "jpg", "jpeg", "webp"], accept_multiple_files=True)
+        if files:
+            c1, c2 = st.columns(2)
+            unit = c1.selectbox("Unit", ["Percent", "Width (px)"])
+            fmt = c2.selectbox("Format", ["JPG", "PNG", "WEBP"])
+            if unit == "Percent":
+                params = {"percent": st.slider("Percentage", 1, 200, 50)}
+            else:
+                params = {"width": st.number_input("Width (height keeps ratio)", min_value=1, value=1024)}
+            render_batch("resize", {**params, "fmt": fmt}, files)
+        else:
+            render_batch_job("resize")
+        return
     uploaded = st.file_uploader("Upload Image", type=["png", "jpg", "jpeg", "webp"])
+    decision = uploaded and admission("resize", uploaded, inline=True)
     
-    if uploaded:
-        img = Image.open(uploaded)
-        st.image(img, caption=f"Original: {img.width}x{img.height}", width=300)
+    if decision:
+        preview, (img_w, img_h), _ = load_preview(uploaded, "resize_image")
+        st.image(preview, caption=f"Original: {img_w}x{img_h}", width=300)
         st.markdown("---")
         
         # Settings Row
@@ -358,132 +606,260 @@ def tool_resize_image():
         
         c4, c5 = st.columns(2)
         if unit == "Pixels":
-            w = c4.number_input("Width", value=img.width)
+            w = c4.number_input("Width", value=img_w)
             if lock:
-                h = int(w * (img.height/img.width))
+                h = int(w * (img_h/img_w))
                 c5.number_input("Height (Auto)", value=h, disabled=True)
             else:
-                h = c5.number_input("Height", value=img.height)
+                h = c5.number_input("Height", value=img_h)
         else:
             pct = st.slider("Percentage", 1, 200, 100)
-            w, h = int(img.width * (pct/100)), int(img.height * (pct/100))
+            w, h = int(img_w * (pct/100)), int(img_h * (pct/100))
             st.caption(f"Output: {w} x {h}")
 
         if st.button("Resize Image", type="primary", use_container_width=True):
-            new_img = img.resize((w, h), Image.Resampling.LANCZOS)
-            b = BytesIO()
-            save_fmt = "JPEG" if fmt == "JPG" else fmt
-            if save_fmt == "JPEG" and new_img.mode in ("RGBA", "P"): new_img = new_img.convert("RGB")
-            new_img.save(b, format=save_fmt, quality=95)
-            
-            st.markdown('<div class="result-box">', unsafe_allow_html=True)
-            st.image(new_img, caption="Resized Result", width=300)
-            st.download_button("Download Image", b.getvalue(), f"resized.{save_fmt.lower()}", f"image/{save_fmt.lower()}", type="primary")
-            st.markdown('</div>', unsafe_allow_html=True)
+            if int(w) * int(h) > LIMITS["resize"]["max_pixels"]:
+                st.error(f"⛔ {int(w)}x{int(h)} is over the {LIMITS['resize']['max_pixels'] / 1e6:.0f} MP output limit.")
+            elif decision.action == "background":
+                submit_job("resize_image", "image", [(uploaded.name, uploaded)],
+                           {"operation": "resize", "params": {"width": int(w), "height": int(h), "fmt": fmt}}, f"Resizing {uploaded.name}")
+            else:
+                forget_job("resize_image")
+                def compute():
+                    b, save_fmt = resize_image(load_image(uploaded, "resize_image"), int(w), int(h), fmt)
+                    return b.getbuffer(), {"format": save_fmt}
+                b, meta = cached_result("resize", [uploaded], {"size": [int(w), int(h)], "fmt": fmt}, compute)
+                save_fmt = meta["format"]
+                
+                st.markdown('<div class="result-box">', unsafe_allow_html=True)
+                with ARTIFACTS.open(b) as fh:
+                    st.image(make_preview(fh)[0], caption=f"Resized Result: {int(w)}x{int(h)}", width=300)
+                download_result("Download Image", b, f"resized.{save_fmt.lower()}", f"image/{save_fmt.lower()}")
+                st.markdown('</div>', unsafe_allow_html=True)
+    render_image_job("resize_image", "resized", uploaded)
 
 def tool_img_editor():
+    from engine import apply_edits, edit_image, make_preview
     st.markdown("### Image Editor")
+    restore("edit_batch", bool(st.query_params.get("job_batch_edit")))
+    if st.checkbox("Batch mode (multiple files)", key="edit_batch"):
+        files = st.file_uploader("Upload Images", type=["png", "jpg"], accept_multiple_files=True)
+        if files:
+            c1, c2 = st.columns(2)
+            angle = c1.slider("Rotate", 0, 360, 0)
+            filt = c2.selectbox("Filter", ["None", "Grayscale", "Blur", "Sharpen", "Contour"])
+            render_batch("edit", {"angle": angle, "filt": filt}, files)
+        else:
+            render_batch_job("edit")
+        return
     uploaded = st.file_uploader("Upload Image", type=["png", "jpg"])
+    decision = uploaded and admission("edit", uploaded, inline=True)
     
-    if uploaded:
-        img = Image.open(uploaded)
-        st.image(img, caption="Original", width=300)
-        st.markdown("---")
-        
+    if decision:
+        preview = load_preview(uploaded, "img_editor")[0]
         c1, c2 = st.columns(2)
         angle = c1.slider("Rotate", 0, 360, 0)
         filt = c2.selectbox("Filter", ["None", "Grayscale", "Blur", "Sharpen", "Contour"])
         
+        # Live preview: the edit chain runs on the proxy; full resolution only on export
+        p1, p2 = st.columns(2)
+        p1.image(preview, caption="Original", width=300)
+        p2.image(apply_edits(preview, angle, filt), caption="Preview", width=300)
+        st.markdown("---")
+        
         if st.button("Apply Changes", type="primary", use_container_width=True):
-            processed = img.copy()
-            if angle: processed = processed.rotate(angle, expand=True)
-            if filt == "Grayscale": processed = ImageOps.grayscale(processed)
-            elif filt == "Blur": processed = processed.filter(ImageFilter.BLUR)
-            elif filt == "Sharpen": processed = processed.filter(ImageFilter.SHARPEN)
-            elif filt == "Contour": processed = processed.filter(ImageFilter.CONTOUR)
-            
-            st.markdown('<div class="result-box">', unsafe_allow_html=True)
-            st.image(processed, caption="Edited Result", width=300)
-            b = BytesIO()
-            fmt = img.format if img.format else "PNG"
-            processed.save(b, format=fmt)
-            st.download_button("Download Image", b.getvalue(), f"edited.{fmt.lower()}", f"image/{fmt.lower()}", type="primary")
-            st.markdown('</div>', unsafe_allow_html=True)
+            if decision.action == "background":
+                submit_job("img_editor", "image", [(uploaded.name, uploaded)], {"operation": "edit", "params": {"angle": angle, "filt": filt}},
+                           f"Editing {uploaded.name}")
+            else:
+                forget_job("img_editor")
+                def compute():
+                    b, fmt = edit_image(load_image(uploaded, "img_editor"), angle, filt)
+                    return b.getbuffer(), {"format": fmt}
+                b, meta = cached_result("edit", [uploaded], {"angle": angle, "filt": filt}, compute)
+                fmt = meta["format"]
+                
+                st.markdown('<div class="result-box">', unsafe_allow_html=True)
+                with ARTIFACTS.open(b) as fh:
+                    st.image(make_preview(fh)[0], caption="Edited Result", width=300)
+                download_result("Download Image", b, f"edited.{fmt.lower()}", f"image/{fmt.lower()}")
+                st.markdown('</div>', unsafe_allow_html=True)
+    render_image_job("img_editor", "edited", uploaded)
 
 def tool_merge_pdf():
+    from engine import merge_pdfs
     st.markdown("### Merge PDFs")
     files = st.file_uploader("Select PDF Files", type="pdf", accept_multiple_files=True)
+    decision = files and admission("merge", files, inline=True)
+    sources = files or []
     
-    if files:
+    def show(artifact, meta):
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success(f"PDFs Merged Successfully! ({meta['pages']} pages, {get_size_format(ARTIFACTS.size(artifact))})")
+        download_result("Download Merged PDF", artifact, "merged.pdf", "application/pdf")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    if decision:
         file_map = {f.name: f for f in files}
         st.write("Drag to reorder:")
         order = st.multiselect("Sequence", list(file_map.keys()), default=list(file_map.keys()))
+        sources = [file_map[name] for name in order]
+        
+        total_size = sum(f.size for f in files)
+        low_memory = st.checkbox("Low-memory mode (disk-backed, for large files)", value=total_size > LOW_MEMORY_MERGE_BYTES)
+        if low_memory or decision.action == "background": st.caption(STREAMED_PDF_NOTE)
         
         if st.button("Merge Files", type="primary", use_container_width=True):
-            merger = PdfWriter()
-            for name in order: merger.append(file_map[name])
-            out = BytesIO()
-            merger.write(out)
-            
-            st.markdown('<div class="result-box">', unsafe_allow_html=True)
-            st.success("PDFs Merged Successfully!")
-            st.download_button("Download Merged PDF", out.getvalue(), "merged.pdf", "application/pdf", type="primary")
-            st.markdown('</div>', unsafe_allow_html=True)
+            if low_memory or decision.action == "background":
+                # Pages are streamed to the job's result file in the background
+                submit_job("merge", "merge", [(name, file_map[name]) for name in order], label=f"Merging {len(order)} files")
+            else:
+                forget_job("merge")
+                out, _ = cached_result("merge", sources, {}, lambda: (merge_pdfs(sources).getbuffer(), {}))
+                
+                st.markdown('<div class="result-box">', unsafe_allow_html=True)
+                st.success("PDFs Merged Successfully!")
+                download_result("Download Merged PDF", out, "merged.pdf", "application/pdf")
+                st.markdown('</div>', unsafe_allow_html=True)
+    render_job("merge", show, sources)
 
 def tool_split_pdf():
+    from engine import extract_page, parse_page_spec, plan_pages, NUP_LAYOUTS
     st.markdown("### Split PDF")
     f = st.file_uploader("Upload PDF", type="pdf")
+    decision = f and admission("split", f)
+    
+    def show_pages(artifact, meta):
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success(f"Created a {meta['pages']}-page PDF ({get_size_format(ARTIFACTS.size(artifact))})")
+        download_result("Download PDF", artifact, meta["filename"], "application/pdf")
+        st.markdown('</div>', unsafe_allow_html=True)
     
-    if f:
-        reader = PdfReader(f)
-        total = len(reader.pages)
+    def show_split(artifact, meta):
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success(f"Split into {meta['files']} files!")
+        download_result("Download ZIP", artifact, "split.zip", "application/zip")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    if not f:
+        render_job("organize_pages", show_pages)
+        render_job("split", show_split)
+    if decision:
+        # Page count from the parsed page tree (the trailer's /Count used by admission can be wrong)
+        total = len(load_pdf(f, "split_pdf").pages)
         st.info(f"Detected {total} Pages")
         
-        mode = st.radio("Action", ["Extract Single Page", "Split All to ZIP"], horizontal=True)
+        modes = ["Extract Single Page", "Organize Pages", "Split All to ZIP", "Split by Ranges"]
+        restore("split_mode", modes[1] if st.query_params.get("job_organize_pages") else modes[2] if st.query_params.get("job_split") else modes[0])
+        mode = st.radio("Action", modes, horizontal=True, key="split_mode")
         
         if mode == "Extract Single Page":
             p_num = st.number_input("Page Number", 1, total, 1)
+            if THUMBS.available:
+                thumb = THUMBS.get(thumbnail_doc(f), [p_num - 1], timeout=10)[p_num - 1]
+                if thumb: st.image(thumb, caption=f"Page {p_num}", width=160)
             if st.button("Extract Page", type="primary", use_container_width=True):
-                w = PdfWriter()
-                w.add_page(reader.pages[p_num-1])
-                o = BytesIO()
-                w.write(o)
+                o, _ = cached_result("extract_page", [f], {"page": p_num}, lambda: (extract_page(load_pdf(f, "split_pdf"), p_num-1).getbuffer(), {}))
                 st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                st.download_button("Download Page", o.getvalue(), f"page_{p_num}.pdf", "application/pdf", type="primary")
+                download_result("Download Page", o, f"page_{p_num}.pdf", "application/pdf")
                 st.markdown('</div>', unsafe_allow_html=True)
+        elif mode == "Organize Pages":
+            try:
+                pages = render_page_picker(f, total)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            c1, c2, c3 = st.columns(3)
+            angle = c1.selectbox("Rotate (clockwise)", [0, 90, 180, 270], format_func=lambda a: f"{a}°")
+            rotate_spec = c2.text_input("Rotate which pages", "all", help="Positions in the output, e.g. '1,3-4'", disabled=not angle)
+            per_sheet = c3.selectbox("Pages per sheet", [1] + list(NUP_LAYOUTS))
+            # One operation list, applied in a single pass over the document
+            operations = [{"op": "select", "pages": [p + 1 for p in pages]}]
+            if angle: operations.append({"op": "rotate", "pages": rotate_spec, "angle": angle})
+            if per_sheet > 1: operations.append({"op": "nup", "n": per_sheet})
+            try:
+                sheets = len(plan_pages(total, operations)[0]) if pages else 0
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.caption(f"Output: {len(pages)} of {total} pages" + (f" on {sheets} sheets" if per_sheet > 1 else ""))
+            st.caption(STREAMED_PDF_NOTE)
+            if st.button("Create PDF", type="primary", use_container_width=True, disabled=not pages):
+                submit_job("organize_pages", "page_ops", [(f.name, f)], {"operations": operations}, f"Organizing {len(pages)} pages of {f.name}",
+                           filename=f"pages_{f.name}")
+            render_job("organize_pages", show_pages, [f])
         else:
-            if st.button("Split All Pages", type="primary", use_container_width=True):
-                files = {}
-                for i in range(total):
-                    w = PdfWriter()
-                    w.add_page(reader.pages[i])
-                    o = BytesIO()
-                    w.write(o)
-                    files[f"page_{i+1}.pdf"] = o.getvalue()
-                
-                st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                st.success("All pages split successfully!")
-                st.download_button("Download ZIP", create_zip(files, "split.zip"), "split.zip", "application/zip", type="primary")
-                st.markdown('</div>', unsafe_allow_html=True)
+            spec = "all"
+            if mode == "Split by Ranges":
+                spec = st.text_input("Page Ranges", "1-5,8", help="One file per range, e.g. '1-5,8,12-20', or 'every 10' for fixed-size chunks")
+            st.caption(STREAMED_PDF_NOTE)
+            if st.button("Split Pages", type="primary", use_container_width=True):
+                try:
+                    groups = parse_page_spec(spec, total)
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                submit_job("split", "split", [(f.name, f)], {"groups": groups}, f"Splitting {f.name}")
+            render_job("split", show_split, [f])
+
+def tool_merge_pptx():
+    from engine import PPTX_MIME
+    st.markdown("### Merge PPTX")
+    files = st.file_uploader("Select PowerPoint Files", type="pptx", accept_multiple_files=True)
+    decision = files and admission("merge_pptx", files)
+    sources = files or []
+    
+    def show(artifact, meta):
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success(f"Decks Merged Successfully! ({meta['slides']} slides, {get_size_format(ARTIFACTS.size(artifact))})")
+        if meta["deduplicated"]:
+            st.caption(f"{meta['deduplicated']} repeated media files stored once, saving {get_size_format(meta['saved_bytes'])}")
+        download_result("Download Merged PPTX", artifact, "merged.pptx", PPTX_MIME)
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    if decision:
+        file_map = {f.name: f for f in files}
+        st.write("Drag to reorder:")
+        order = st.multiselect("Sequence", list(file_map.keys()), default=list(file_map.keys()))
+        sources = [file_map[name] for name in order]
+        st.caption(f"{decision.pages} slides in {len(files)} decks. The first deck's slide size and settings are kept.")
+        
+        if st.button("Merge Decks", type="primary", use_container_width=True, disabled=not order):
+            # Parts are streamed between the ZIPs on disk; identical media is stored once
+            submit_job("merge_pptx", "merge_pptx", [(name, file_map[name]) for name in order], label=f"Merging {len(order)} decks")
+    render_job("merge_pptx", show, sources)
 
 def tool_convert_format():
+    from engine import convert_image
     st.markdown("### Convert Format")
+    restore("convert_batch", bool(st.query_params.get("job_batch_convert")))
+    if st.checkbox("Batch mode (multiple files)", key="convert_batch"):
+        files = st.file_uploader("Upload Images", type=["png", "jpg", "webp"], accept_multiple_files=True)
+        if files:
+            target = st.selectbox("Convert To", ["PNG", "JPEG", "PDF", "WEBP"])
+            render_batch("convert", {"target": target}, files)
+        else:
+            render_batch_job("convert")
+        return
     u = st.file_uploader("Upload Image", type=["png", "jpg", "webp"])
+    decision = u and admission("convert", u, inline=True)
     
-    if u:
-        st.image(u, width=200)
+    if decision:
+        st.image(load_preview(u, "convert_format")[0], width=200)
         target = st.selectbox("Convert To", ["PNG", "JPEG", "PDF", "WEBP"])
         
         if st.button("Convert File", type="primary", use_container_width=True):
-            i = Image.open(u)
-            if target == "JPEG" and i.mode == "RGBA": i = i.convert("RGB")
-            b = BytesIO()
-            i.save(b, format=target)
-            mime = "application/pdf" if target == "PDF" else f"image/{target.lower()}"
-            
-            st.markdown('<div class="result-box">', unsafe_allow_html=True)
-            st.download_button(f"Download {target}", b.getvalue(), f"converted.{target.lower()}", mime, type="primary")
-            st.markdown('</div>', unsafe_allow_html=True)
+            if decision.action == "background":
+                submit_job("convert_format", "image", [(u.name, u)], {"operation": "convert", "params": {"target": target}}, f"Converting {u.name}")
+            else:
+                forget_job("convert_format")
+                b, _ = cached_result("convert", [u], {"target": target}, lambda: (convert_image(u, target).getbuffer(), {}))
+                mime = "application/pdf" if target == "PDF" else f"image/{target.lower()}"
+                
+                st.markdown('<div class="result-box">', unsafe_allow_html=True)
+                download_result(f"Download {target}", b, f"converted.{target.lower()}", mime)
+                st.markdown('</div>', unsafe_allow_html=True)
+    render_image_job("convert_format", "converted", u)
 
 def tool_notebook_to_pdf():
     st.markdown("### Jupyter Notebook to PDF (PDFKit)")
@@ -491,26 +867,39 @@ def tool_notebook_to_pdf():
 
     uploaded = st.file_uploader("Upload .ipynb file", type=["ipynb"])
     
-    if uploaded:
+    def show(artifact, meta):
+        st.markdown('<div class="result-box">', unsafe_allow_html=True)
+        st.success("Conversion Successful!")
+        download_result("Download PDF", artifact, meta["filename"], "application/pdf")
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    if uploaded and admission("notebook_to_pdf", uploaded):
         st.write("File loaded. Ready to convert.")
         
         if st.button("Convert to PDF", type="primary", use_container_width=True):
-            with st.spinner("Converting Notebook... this may take a moment"):
-                # Reset file pointer if re-running
-                uploaded.seek(0)
-                pdf_bytes, status = convert_notebook_to_pdf_bytes(uploaded)
-                
-                st.markdown('<div class="result-box">', unsafe_allow_html=True)
-                if pdf_bytes:
-                    st.success("Conversion Successful!")
-                    st.download_button("Download PDF", pdf_bytes, f"{uploaded.name}.pdf", "application/pdf", type="primary")
-                else:
-                    st.error(f"Conversion Failed: {status}")
-                    if "wkhtmltopdf" in status:
-                        st.warning("Hint: If running locally, please install 'wkhtmltopdf'. If on Cloud, ensure 'packages.txt' is present.")
-                st.markdown('</div>', unsafe_allow_html=True)
+            key = cache_key("notebook_to_pdf", [uploaded], {})
+            hit = cache_lookup("notebook_to_pdf", key)
+            if hit:
+                forget_job("notebook")
+                show(hit[0], dict(hit[1], filename=f"{uploaded.name}.pdf"))
+            else:
+                submit_job("notebook", "notebook_to_pdf", [(uploaded.name, uploaded)], label=f"Converting {uploaded.name}", key=key,
+                           filename=f"{uploaded.name}.pdf")
+    render_job("notebook", show, [uploaded] if uploaded else [])
+    state = JOBS.status(st.session_state.get("job_notebook"))
+    if state and state["status"] == "failed" and "wkhtmltopdf" in state["error"]:
+        st.warning("Hint: If running locally, please install 'wkhtmltopdf'. If on Cloud, ensure 'packages.txt' is present.")
+
+    r = get_renderer().stats()
+    st.caption(f"Renderer: {r['running']}/{r['workers']} busy, {r['queue_depth']} queued, "
+               f"avg {r['avg_render_seconds']:.1f}s (max {r['max_render_seconds']:.1f}s), "
+               f"{r['timeouts']} timed out, {r['rejected']} rejected")
 
 # --- 8. MAIN ROUTING ---
+if st.query_params.get("stats"):
+    render_stats_page(st.query_params["stats"])
+    st.stop()
+
 render_sidebar()
 
 # Render Horizontal Nav at the Top
@@ -518,6 +907,7 @@ tool = render_horizontal_nav()
 st.session_state['current_tool'] = tool
 
 # Tool Logic
+for name in TOOL_PRELOADS.get(tool, ()): PRELOAD.load(name)
 if tool == "Compress Docs": tool_compress_docs()
 elif tool == "Resize Image": tool_resize_image()
 elif tool == "Image Editor": tool_img_editor()
@@ -526,18 +916,29 @@ elif tool == "Split PDF": tool_split_pdf()
 elif tool == "Convert Format": tool_convert_format()
 elif tool == "Notebook to PDF": tool_notebook_to_pdf()
 elif tool == "JPG to PDF":
+    from engine import PAGE_SIZES
     st.markdown("### JPG to PDF")
     u = st.file_uploader("Upload Images", type=["png", "jpg"], accept_multiple_files=True)
-    if u and st.button("Create PDF", type="primary", use_container_width=True):
-        imgs = [Image.open(f).convert("RGB") for f in u]
-        b = BytesIO()
-        imgs[0].save(b, "PDF", save_all=True, append_images=imgs[1:])
+    
+    def show(artifact, meta):
         st.markdown('<div class="result-box">', unsafe_allow_html=True)
-        st.download_button("Download PDF", b.getvalue(), "docmint_images.pdf", "application/pdf", type="primary")
+        st.success(f"Created {meta['pages']} pages ({get_size_format(ARTIFACTS.size(artifact))})")
+        download_result("Download PDF", artifact, "docmint_images.pdf", "application/pdf")
         st.markdown('</div>', unsafe_allow_html=True)
-elif tool == "Merge PPTX":
-     st.markdown("### Merge PPTX")
-     st.info("Coming soon in next update!")
+    
+    if u and admission("images_to_pdf", u):
+        c1, c2 = st.columns(2)
+        page_size = c1.selectbox("Page Size", ["Fit to image"] + list(PAGE_SIZES))
+        dpi = c2.selectbox("Resolution", ["Original", 300, 200, 150], help="With a fixed page size, images above this DPI are downsampled; otherwise it sets the page size")
+        if st.button("Create PDF", type="primary", use_container_width=True):
+            # Pages are streamed to disk one image at a time; unchanged JPEGs are embedded as-is
+            params = {"page_size": None if page_size == "Fit to image" else page_size, "dpi": None if dpi == "Original" else dpi}
+            submit_job("images_to_pdf", "images_to_pdf", [(f.name, f) for f in u], params, f"Building PDF from {len(u)} images")
+    render_job("images_to_pdf", show, u or [])
+elif tool == "Merge PPTX": tool_merge_pptx()
 
 st.markdown("---")
 st.markdown("<div style='text-align:center; color:#64748b; font-size:0.82rem;'>© 2024 DocMint by Nitesh Kumar</div>", unsafe_allow_html=True)
+
+# The page is out: with DOCMINT_PREWARM=1, load the other tools in the background so their first use is warm too
+PRELOAD.prewarm()
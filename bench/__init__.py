@@ -0,0 +1 @@
+"""Benchmarks for the processing engine; see bench/run.py."""
@@ -0,0 +1,161 @@
+"""
+Reproducible synthetic inputs for the benchmarks.
+
+Everything is generated from fixed seeds with Python's own PRNG (no network, no sample
+files), written once under FIXTURE_DIR and reused by later runs.
+"""
+import base64
+from io import BytesIO
+import os
+import random
+import tempfile
+import zlib
+
+from PIL import Image, ImageDraw
+from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject, NumberObject, StreamObject
+
+from engine import PdfStreamWriter, add_image_page
+
+# Bump when a generator changes so stale fixtures are rebuilt
+FIXTURE_VERSION = 1
+FIXTURE_DIR = os.environ.get(
+    "DOCMINT_BENCH_FIXTURES", os.path.join(tempfile.gettempdir(), f"docmint-bench-fixtures-v{FIXTURE_VERSION}")
+)
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+          "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi").split()
+
+
+def _noise(size, seed, amplitude=16, tile=509):
+    """Gray noise around 128, built from a seeded tile (Pillow's effect_noise is not seedable)."""
+    rng = random.Random(seed)
+    cell = Image.frombytes("L", (tile, tile), rng.randbytes(tile * tile))
+    cell = cell.point(lambda v: 128 + (v - 128) * amplitude // 128)
+    out = Image.new("L", size)
+    for y in range(0, size[1], tile):
+        for x in range(0, size[0], tile):
+            out.paste(cell, (x, y))
+    return out
+
+
+def photo(megapixels, seed=0):
+    """Photo-like 4:3 RGB image: smooth gradients, some hard-edged shapes and sensor-style noise."""
+    w = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    h = int(megapixels * 1e6 / w)
+    rng = random.Random(seed)
+    gradient = Image.linear_gradient("L")
+    img = Image.merge("RGB", [gradient.rotate(rng.randrange(360)).resize((w, h), Image.Resampling.BILINEAR) for _ in range(3)])
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(w), rng.randrange(h)
+        r = rng.randrange(w // 40, w // 6)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = _noise((w, h), seed)
+    return Image.merge("RGB", [Image.blend(band, noise, 0.25) for band in img.split()])
+
+
+def scan_page(seed, size=(1275, 1650)):
+    """Grayscale 150 dpi letter "scan": paper noise with dark word-shaped blocks."""
+    rng = random.Random(seed)
+    page = _noise(size, seed, amplitude=24).point(lambda v: v + 100)
+    draw = ImageDraw.Draw(page)
+    for y in range(120, size[1] - 120, 34):
+        x = 110
+        while x < size[0] - 160:
+            word = rng.randrange(25, 110)
+            draw.rectangle((x, y, x + word, y + 16), fill=rng.randrange(20, 70))
+            x += word + rng.randrange(12, 22)
+    return page
+
+
+def _write(path, build):
+    """Build into a temp file next to path and rename, so an interrupted run leaves no partial fixture."""
+    if os.path.exists(path): return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".part"
+    with open(tmp, "wb") as fh:
+        build(fh)
+    os.replace(tmp, path)
+    return path
+
+
+def photo_file(megapixels, fmt="JPEG"):
+    ext = "jpg" if fmt == "JPEG" else fmt.lower()
+    path = os.path.join(FIXTURE_DIR, f"photo_{megapixels}mp.{ext}")
+    return _write(path, lambda fh: photo(megapixels).save(fh, fmt, **({"quality": 92} if fmt == "JPEG" else {})))
+
+
+def mpo_file(megapixels):
+    """Multi-picture JPEG as phone cameras write it: the photo plus a smaller second frame."""
+    def build(fh):
+        img = photo(megapixels)
+        img.save(fh, "MPO", save_all=True, append_images=[img.resize((img.width // 4, img.height // 4))], quality=92)
+    return _write(os.path.join(FIXTURE_DIR, f"photo_{megapixels}mp.mpo.jpg"), build)
+
+
+def cmyk_file(megapixels):
+    """CMYK JPEG as print workflows export it (Adobe marker, inverted samples)."""
+    return _write(os.path.join(FIXTURE_DIR, f"photo_{megapixels}mp.cmyk.jpg"),
+                  lambda fh: photo(megapixels).convert("CMYK").save(fh, "JPEG", quality=92))
+
+
+def text_pdf(pages):
+    """Text-only PDF: Helvetica paragraphs in Flate-compressed content streams, one shared font."""
+    def build(fh):
+        rng = random.Random(pages)
+        writer = PdfStreamWriter(fh)
+        font = writer.add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }))
+        for n in range(pages):
+            lines = [" ".join(rng.choice(_WORDS) for _ in range(12)) for _ in range(48)]
+            text = "BT /F1 10 Tf 14 TL 56 760 Td " + " ".join(f"({line}) '" for line in lines) + f" (Page {n + 1}) ' ET"
+            content = StreamObject()
+            content._data = zlib.compress(text.encode())
+            content[NameObject("/Filter")] = NameObject("/FlateDecode")
+            writer.add_page(DictionaryObject({
+                NameObject("/Type"): NameObject("/Page"),
+                NameObject("/MediaBox"): ArrayObject(NumberObject(v) for v in (0, 0, 612, 792)),
+                NameObject("/Resources"): DictionaryObject({
+                    NameObject("/Font"): DictionaryObject({NameObject("/F1"): font}),
+                }),
+                NameObject("/Contents"): writer.add_object(content),
+            }))
+        writer.close()
+    return _write(os.path.join(FIXTURE_DIR, f"text_{pages}p.pdf"), build)
+
+
+def scanned_pdf(pages):
+    """Scanned PDF: one 150 dpi grayscale JPEG per letter page, each page different."""
+    def build(fh):
+        writer = PdfStreamWriter(fh)
+        for n in range(pages):
+            buf = BytesIO()
+            scan_page(n).save(buf, "JPEG", quality=80)
+            add_image_page(writer, buf, dpi=150)
+        writer.close()
+    return _write(os.path.join(FIXTURE_DIR, f"scanned_{pages}p.pdf"), build)
+
+
+def notebook(cells):
+    """Notebook whose code cells carry heavy outputs: long streams, PNG plots and HTML tables."""
+    import nbformat
+
+    def build(fh):
+        rng = random.Random(cells)
+        plot = BytesIO()
+        photo(0.5, seed=cells).resize((800, 600)).save(plot, "PNG")
+        png = base64.b64encode(plot.getvalue()).decode()
+        nb = nbformat.v4.new_notebook()
+        for n in range(cells):
+            nb.cells.append(nbformat.v4.new_markdown_cell(f"## Section {n + 1}\n\n" + " ".join(rng.choice(_WORDS) for _ in range(80))))
+            rows = "".join(f"<tr><td>{i}</td><td>{rng.random():.6f}</td><td>{rng.choice(_WORDS)}</td></tr>" for i in range(200))
+            nb.cells.append(nbformat.v4.new_code_cell(f"run_step({n})", execution_count=n + 1, outputs=[
+                nbformat.v4.new_output("stream", name="stdout", text="".join(f"step {n} iteration {i}: loss={rng.random():.5f}\n" for i in range(2000))),
+                nbformat.v4.new_output("display_data", data={"image/png": png, "text/plain": "<Figure>"}),
+                nbformat.v4.new_output("execute_result", execution_count=n + 1, data={"text/html": f"<table>{rows}</table>", "text/plain": "<DataFrame>"}),
+            ]))
+        fh.write(nbformat.writes(nb).encode())
+    return _write(os.path.join(FIXTURE_DIR, f"notebook_{cells}cells.ipynb"), build)
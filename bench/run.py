@@ -0,0 +1,324 @@
+"""
+Benchmark the engine on synthetic fixtures and store the results as JSON.
+
+    python -m bench.run                          # quick profile -> bench/results/<commit>.json
+    python -m bench.run --profile full           # 1-50 MP images, 10-5000 page PDFs, heavy notebooks
+    python -m bench.run --only merge --repeat 5  # operations whose name starts with "merge"
+    python -m bench.run --compare old.json new.json
+    python -m bench.run --imports                # cold import time of each tool's modules
+
+Each case runs in a fresh process so its peak RSS is its own. Runs offline; the notebook
+PDF case reports an error instead of a time when wkhtmltopdf is not installed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench import fixtures
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# A case is flagged in --compare when it got this much slower (or bigger)
+REGRESSION_THRESHOLD = 1.10
+
+
+# --- operations: fixture path -> dict of extra result fields (output_bytes, encodes, pages...) ---
+def _compress_image(path):
+    from engine import compress_image_to_target
+    with open(path, "rb") as fh:
+        buf, method, encodes = compress_image_to_target(fh, os.path.getsize(path) // 4 // 1024)
+    return {"output_bytes": buf.tell() if buf else 0, "encodes": encodes, "method": method}
+
+
+def _resize_image(path):
+    from engine import open_image, resize_image
+    w, h = open_image(path).size
+    buf, _ = resize_image(path, w // 2, h // 2, "JPG")
+    return {"output_bytes": buf.tell()}
+
+
+def _edit_image(path):
+    from engine import edit_image
+    buf, _ = edit_image(path, 90, "Sharpen")
+    return {"output_bytes": buf.tell()}
+
+
+def _convert_image(path):
+    from engine import convert_image
+    buf = convert_image(path, "PNG" if path.endswith(".jpg") else "JPEG")
+    return {"output_bytes": buf.tell()}
+
+
+def _images_to_pdf(path):
+    from engine import images_to_pdf_file
+    with tempfile.TemporaryFile() as out:
+        pages = images_to_pdf_file([path] * 20, out)
+        return {"output_bytes": out.tell(), "pages": pages}
+
+
+def _images_to_pdf_fitted(path):
+    from io import BytesIO
+    from PIL import Image
+    from PyPDF2 import PdfReader
+    from engine import images_to_pdf_file
+    with tempfile.TemporaryFile() as out:
+        pages = images_to_pdf_file([path] * 20, out, page_size="A4", dpi=150)
+        size = out.tell()
+        out.seek(0)
+        # Downsampled pages are re-encoded; an Adobe-style CMYK JPEG without /Decode shows as a negative
+        for xobj in PdfReader(out).pages[0]["/Resources"]["/XObject"].values():
+            xobj = xobj.get_object()
+            img = Image.open(BytesIO(xobj._data)) if xobj.get("/Filter") == "/DCTDecode" else None
+            if img and img.mode == "CMYK" and ("adobe" in img.info) != ("/Decode" in xobj):
+                raise ValueError("CMYK image would render with inverted colours")
+        return {"output_bytes": size, "pages": pages}
+
+
+def _compress_pdf(path):
+    from engine import compress_pdf
+    out, report = compress_pdf(path, "Medium")
+    return {"output_bytes": out.tell(), "images": report["images"], "deduplicated": report["deduplicated"]}
+
+
+def _merge_pdfs(path):
+    from engine import merge_pdfs
+    with open(path, "rb") as first, open(path, "rb") as second:
+        return {"output_bytes": merge_pdfs([first, second]).tell()}
+
+
+def _merge_pdfs_to_file(path):
+    from engine import merge_pdfs_to_file
+    with tempfile.TemporaryFile() as out:
+        pages = merge_pdfs_to_file([path, path], out)
+        return {"output_bytes": out.tell(), "pages": pages}
+
+
+def _split_pdf(path):
+    from PyPDF2 import PdfReader
+    from engine import parse_page_spec, split_pdf_to_zip
+    groups = parse_page_spec("all", len(PdfReader(path).pages))
+    with tempfile.TemporaryFile() as out:
+        files = split_pdf_to_zip(path, out, groups)
+        return {"output_bytes": out.tell(), "files": files}
+
+
+def _notebook_to_html(path):
+    import nbformat
+    from nbconvert import HTMLExporter
+    body, _ = HTMLExporter(template_name="classic").from_notebook_node(nbformat.read(path, as_version=4))
+    return {"output_bytes": len(body.encode())}
+
+
+def _notebook_to_pdf(path):
+    from engine import convert_notebook_to_pdf_bytes
+    with open(path, "rb") as fh:
+        pdf_bytes, status = convert_notebook_to_pdf_bytes(fh)
+    if pdf_bytes is None: raise RuntimeError(status)
+    return {"output_bytes": len(pdf_bytes)}
+
+
+OPERATIONS = {
+    "compress_image": _compress_image,
+    "resize_image": _resize_image,
+    "edit_image": _edit_image,
+    "convert_image": _convert_image,
+    "images_to_pdf": _images_to_pdf,
+    "images_to_pdf_fitted": _images_to_pdf_fitted,
+    "compress_pdf": _compress_pdf,
+    "merge_pdfs": _merge_pdfs,
+    "merge_pdfs_to_file": _merge_pdfs_to_file,
+    "split_pdf": _split_pdf,
+    "notebook_to_html": _notebook_to_html,
+    "notebook_to_pdf": _notebook_to_pdf,
+}
+
+IMAGE_OPS = ("compress_image", "resize_image", "edit_image", "convert_image")
+PDF_OPS = ("compress_pdf", "merge_pdfs", "merge_pdfs_to_file", "split_pdf")
+
+PROFILES = {
+    "quick": {"photos": [1, 12], "pngs": [1], "text": [10, 200], "scanned": [10], "notebooks": [10]},
+    "full": {"photos": [1, 12, 24, 50], "pngs": [1, 12], "text": [10, 1000, 5000], "scanned": [10, 100, 500], "notebooks": [10, 50]},
+}
+
+
+def cases(profile):
+    """(operation, fixture builder, builder argument) for every case in the profile."""
+    spec = PROFILES[profile]
+    out = []
+    for mp in spec["photos"]:
+        out += [(op, "photo_file", (mp,)) for op in IMAGE_OPS]
+    for mp in spec["pngs"]:
+        out += [(op, "photo_file", (mp, "PNG")) for op in IMAGE_OPS if op != "compress_image"]
+    out.append(("images_to_pdf", "photo_file", (spec["photos"][-1],)))
+    out.append(("images_to_pdf", "mpo_file", (spec["photos"][-1],)))
+    out.append(("images_to_pdf_fitted", "cmyk_file", (spec["photos"][-1],)))
+    for pages in spec["text"]:
+        # In-memory merge of the largest documents is exactly what the streaming merge avoids
+        out += [(op, "text_pdf", (pages,)) for op in PDF_OPS if not (op == "merge_pdfs" and pages > 1000)]
+    for pages in spec["scanned"]:
+        out += [(op, "scanned_pdf", (pages,)) for op in PDF_OPS]
+    for cells in spec["notebooks"]:
+        out += [(op, "notebook", (cells,)) for op in ("notebook_to_html", "notebook_to_pdf")]
+    return out
+
+
+def _peak_rss_mb():
+    # VmHWM is reset by exec; ru_maxrss would also count the parent's RSS at fork time
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"): return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def _run_case(operation, path, repeat, conn):
+    import engine  # noqa: F401  (import cost is not part of the measurement)
+    start_rss = _peak_rss_mb()
+    times, extra, error = [], {}, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            extra = OPERATIONS[operation](path)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            break
+        times.append(time.perf_counter() - start)
+    conn.send({"times": times, "extra": extra, "error": error, "start_rss_mb": start_rss, "peak_rss_mb": _peak_rss_mb()})
+    conn.close()
+
+
+def run_case(operation, path, repeat):
+    """Run one case in a fresh interpreter and return its result record."""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_case, args=(operation, path, repeat, child))
+    proc.start()
+    child.close()
+    try:
+        raw = parent.recv()
+    except EOFError:
+        raw = {"times": [], "extra": {}, "error": "worker died (out of memory?)", "start_rss_mb": None, "peak_rss_mb": None}
+    proc.join()
+
+    record = {
+        "operation": operation, "fixture": os.path.basename(path), "input_bytes": os.path.getsize(path),
+        "runs": len(raw["times"]), "baseline_rss_mb": raw["start_rss_mb"], "peak_rss_mb": raw["peak_rss_mb"],
+        "error": raw["error"],
+    }
+    if raw["times"]:
+        record.update(seconds=statistics.median(raw["times"]), seconds_min=min(raw["times"]))
+    record.update(raw["extra"])
+    return record
+
+
+_IMPORT_CASE = """
+import json
+from engine import get_preloader
+preloader = get_preloader()
+seconds = preloader.load({tool!r})
+print(json.dumps({{"seconds": seconds, "error": preloader.failed.get({tool!r})}}))
+"""
+
+
+def run_import_case(tool, repeat):
+    """Cold import of one tool's modules (its first use after a container start), each run in a fresh interpreter."""
+    runs, error = [], None
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_CASE.format(tool=tool)], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(RESULTS_DIR)))
+        if out.returncode:
+            error = out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"exit code {out.returncode}"
+            break
+        runs.append(json.loads(out.stdout))
+        error = runs[-1]["error"]
+        if error: break
+    record = {"operation": f"import_{tool}", "fixture": "-", "input_bytes": 0, "runs": len(runs),
+              "baseline_rss_mb": None, "peak_rss_mb": None, "error": error}
+    if runs and not error:
+        times = [r["seconds"] for r in runs]
+        record.update(seconds=statistics.median(times), seconds_min=min(times))
+    return record
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(RESULTS_DIR))
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def compare(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """Print per-case time and size ratios; returns the number of regressions."""
+    with open(old_path) as fh: old = {(r["operation"], r["fixture"]): r for r in json.load(fh)["results"]}
+    with open(new_path) as fh: new = json.load(fh)["results"]
+    regressions = 0
+    print(f"{'operation':<20} {'fixture':<26} {'old s':>8} {'new s':>8} {'time':>7} {'size':>7} {'rss':>7}")
+    for r in new:
+        o = old.get((r["operation"], r["fixture"]))
+        if not o or "seconds" not in o or "seconds" not in r: continue
+        ratios = [r["seconds"] / o["seconds"] if o["seconds"] else 1.0]
+        ratios.append(r.get("output_bytes", 0) / o["output_bytes"] if o.get("output_bytes") else 1.0)
+        ratios.append(r["peak_rss_mb"] / o["peak_rss_mb"] if o.get("peak_rss_mb") else 1.0)
+        flag = any(x > threshold for x in ratios)
+        regressions += flag
+        print(f"{r['operation']:<20} {r['fixture']:<26} {o['seconds']:>8.3f} {r['seconds']:>8.3f} "
+              + " ".join(f"{x:>6.2f}x" for x in ratios) + ("  <-- regression" if flag else ""))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", help="run only operations whose name starts with this text")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="results file (default bench/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--imports", action="store_true", help="measure each tool's cold import time instead")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    results = []
+    if args.imports:
+        from engine import TOOL_MODULES
+        for tool in TOOL_MODULES:
+            if args.only and not tool.startswith(args.only): continue
+            record = run_import_case(tool, args.repeat)
+            results.append(record)
+            shown = f"{record['seconds']:.3f}s" if "seconds" in record else f"error: {record['error']}"
+            print(f"{record['operation']:<24} {shown:>10}", flush=True)
+    for operation, builder, build_args in [] if args.imports else cases(args.profile):
+        if args.only and not operation.startswith(args.only): continue
+        path = getattr(fixtures, builder)(*build_args)
+        record = run_case(operation, path, args.repeat)
+        results.append(record)
+        shown = f"{record['seconds']:.3f}s" if "seconds" in record else f"error: {record['error']}"
+        print(f"{operation:<20} {record['fixture']:<26} {shown:>10}  peak {record['peak_rss_mb'] or 0:.0f} MB", flush=True)
+
+    commit = _commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as fh:
+        json.dump({
+            "commit": commit, "profile": args.profile, "repeat": args.repeat, "created": time.time(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "results": results,
+        }, fh, indent=1)
+    print(f"Wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+DocMint processing engine.
+
+Pure functions that take bytes or file-like streams and return bytes or buffers,
+with no Streamlit dependency, so the same code can back the UI, batch jobs or an API.
+
+Names are re-exported lazily: `from engine import resize_image` imports engine.images
+(and Pillow) on first use, so importing the package itself stays cheap.
+"""
+import importlib
+
+_EXPORTS = {
+    "common": ("as_stream", "read_bytes", "spool"),
+    "metrics": ("PHASES", "MetricsRegistry", "Operation", "OperationCancelled", "get_metrics", "phase", "record", "serve_metrics", "track"),
+    "archive": ("is_compressible", "write_zip"),
+    "images": ("open_image", "make_preview", "compress_image_to_target", "resize_image", "apply_edits", "edit_image",
+               "convert_image"),
+    "pdf": ("open_pdf", "merge_pdfs", "extract_page"),
+    "pdf_stream": ("PdfStreamWriter", "merge_pdfs_to_file"),
+    "image_pdf": ("PAGE_SIZES", "add_image_page", "images_to_pdf_file"),
+    "pdf_split": ("parse_page_spec", "iter_split", "split_pdf_to_zip"),
+    "page_ops": ("NUP_LAYOUTS", "PAGE_OPERATIONS", "apply_page_ops", "plan_pages"),
+    "pptx_merge": ("PPTX_MIME", "PptxMerger", "count_slides", "merge_pptx_to_file"),
+    "pdf_compress": ("COMPRESSION_PROFILES", "compress_pdf"),
+    "batch": ("BATCH_OPERATIONS", "iter_batch", "batch_to_zip"),
+    "cache": ("ResultCache", "cache_key", "get_result_cache"),
+    "artifacts": ("ArtifactStore", "get_artifact_store"),
+    "docstore": ("DocumentStore", "upload_id", "image_cost"),
+    "notebook": ("NotebookRenderer", "get_renderer", "convert_notebook_to_pdf_bytes"),
+    "thumbnails": ("POPPLER_MISSING", "ThumbnailIndex", "get_thumbnail_index"),
+    "admission": ("LIMITS", "SESSION_JOBS", "SYNC_SECONDS", "Decision", "admit", "estimate_seconds", "inspect_image",
+                  "inspect_pdf", "inspect_pptx"),
+    "jobs": ("ACTIVE_STATES", "JOB_OPERATIONS", "Job", "JobCancelled", "JobQueue", "get_job_queue"),
+    "preload": ("TOOL_MODULES", "Preloader", "get_preloader"),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None: raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return __all__
@@ -0,0 +1,207 @@
+import json
+import os
+import warnings
+
+from .common import as_stream
+
+MB = 1024 * 1024
+
+# Inline tools whose estimated cost is above this many seconds go to the background queue
+SYNC_SECONDS = float(os.environ.get("DOCMINT_SYNC_SECONDS", "5"))
+# Active background jobs one session may have at a time
+SESSION_JOBS = int(os.environ.get("DOCMINT_SESSION_JOBS", "3"))
+
+_IMAGE = {"max_bytes": 50 * MB, "max_pixels": 100_000_000, "max_decoded_bytes": 400 * MB, "max_seconds": 600}
+# Batches sized for 200-500 image product sets; anything over SYNC_SECONDS runs as a background job,
+# which reads the inputs from disk one at a time, so the file count and time limits can be generous
+_BATCH = {**_IMAGE, "max_files": 500, "max_total_bytes": 2048 * MB, "max_seconds": 3600}
+
+TOOL_KINDS = {
+    "compress_image": "image", "resize": "image", "edit": "image", "convert": "image",
+    "batch_compress": "image", "batch_resize": "image", "batch_edit": "image", "batch_convert": "image",
+    "images_to_pdf": "image",
+    "compress_pdf": "pdf", "merge": "pdf", "split": "pdf",
+    "notebook_to_pdf": "notebook",
+    "merge_pptx": "pptx",
+}
+
+# Per-tool limits; DOCMINT_LIMITS (JSON) overrides them, e.g. {"merge": {"max_pages": 50000}, "*": {"max_seconds": 300}}
+DEFAULT_LIMITS = {
+    "compress_image": {**_IMAGE, "max_files": 1},
+    "resize": {**_IMAGE, "max_files": 1},
+    "edit": {**_IMAGE, "max_files": 1},
+    "convert": {**_IMAGE, "max_files": 1},
+    "batch_compress": _BATCH, "batch_resize": _BATCH, "batch_edit": _BATCH, "batch_convert": _BATCH,
+    "images_to_pdf": {**_IMAGE, "max_files": 500, "max_total_bytes": 1024 * MB},
+    "compress_pdf": {"max_files": 1, "max_bytes": 200 * MB, "max_pages": 2000, "max_seconds": 600},
+    "merge": {"max_files": 100, "max_bytes": 200 * MB, "max_total_bytes": 1024 * MB, "max_pages": 20000, "max_seconds": 600},
+    "split": {"max_files": 1, "max_bytes": 200 * MB, "max_pages": 10000, "max_seconds": 600},
+    "notebook_to_pdf": {"max_files": 1, "max_bytes": 100 * MB, "max_seconds": 600},
+    "merge_pptx": {"max_files": 50, "max_bytes": 500 * MB, "max_total_bytes": 2048 * MB, "max_pages": 5000, "max_seconds": 600},
+}
+
+# Seconds per file / megapixel / page / MB of input, from `python -m bench.run` on one core.
+# PNG sources cost more wherever the output is PNG again (edit keeps the source format).
+COSTS = {
+    "compress_image": {"fixed": 0.05, "per_mp": 0.03},
+    "resize": {"per_mp": 0.04},
+    "edit": {"per_mp": 0.06, "per_png_mp": 0.6},
+    "convert": {"per_mp": 0.37},
+    "images_to_pdf": {"per_file": 0.005, "per_mp": 0.01},
+    "compress_pdf": {"fixed": 0.05, "per_page": 0.005, "per_mb": 0.1},
+    "merge": {"per_page": 0.0005, "per_mb": 0.005},
+    "split": {"per_page": 0.001, "per_mb": 0.005},
+    "notebook_to_pdf": {"fixed": 1.0, "per_mb": 0.5},
+    "merge_pptx": {"per_page": 0.002, "per_mb": 0.01},
+}
+COSTS.update({f"batch_{op}": COSTS[tool] for op, tool in
+              (("compress", "compress_image"), ("resize", "resize"), ("edit", "edit"), ("convert", "convert"))})
+
+
+def _load_limits():
+    limits = {tool: dict(values) for tool, values in DEFAULT_LIMITS.items()}
+    overrides = json.loads(os.environ.get("DOCMINT_LIMITS") or "{}")
+    for tool, values in overrides.items():
+        for name in (limits if tool == "*" else [tool]):
+            limits.setdefault(name, {}).update(values)
+    return limits
+
+
+LIMITS = _load_limits()
+
+
+def _decoded_bytes(width, height, mode):
+    # Pillow keeps 1-band 8-bit modes in one byte per pixel and pads the rest to four
+    per_pixel = 1 if mode in ("1", "L", "P") else 2 if mode.startswith("I;16") else 4
+    return width * height * per_pixel
+
+
+def inspect_image(src):
+    """Dimensions, mode and format from the image header; no pixel data is decoded."""
+    from PIL import Image
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        try:
+            img = Image.open(as_stream(src))
+        except Image.DecompressionBombError:
+            return {"error": f"image has more than {Image.MAX_IMAGE_PIXELS * 2:,} pixels"}
+        except (OSError, SyntaxError, ValueError):
+            return {"error": "not a readable image"}
+    width, height = img.size
+    return {"width": width, "height": height, "pixels": width * height, "mode": img.mode, "format": img.format,
+            "decoded_bytes": _decoded_bytes(width, height, img.mode)}
+
+
+def inspect_pdf(src):
+    """Page count from the trailer (/Root /Pages /Count); only the xref and those two objects are read."""
+    from PyPDF2 import PdfReader
+    try:
+        reader = PdfReader(as_stream(src), strict=False)
+        if reader.is_encrypted: reader.decrypt("")
+        pages = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except Exception:
+        return {"error": "not a readable PDF"}
+    return {"pages": max(pages, 0)}
+
+
+def inspect_pptx(src):
+    """Slide count from presentation.xml; slides and media are not read."""
+    from .pptx_merge import count_slides
+    try:
+        return {"pages": count_slides(src)}
+    except Exception:
+        return {"error": "not a readable PowerPoint file"}
+
+
+def inspect_upload(src, kind):
+    if kind == "image": return inspect_image(src)
+    if kind == "pdf": return inspect_pdf(src)
+    if kind == "pptx": return inspect_pptx(src)
+    return {}
+
+
+def _size(src):
+    if isinstance(src, (bytes, bytearray, memoryview)): return len(src)
+    if isinstance(src, str): return os.path.getsize(src)
+    size = getattr(src, "size", None)
+    if size is not None: return size
+    stream = as_stream(src)
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    return size
+
+
+def estimate_seconds(tool, inputs):
+    """Expected run time of tool over inspected inputs (dicts with bytes, pixels, pages, format)."""
+    c = COSTS.get(tool, {})
+    seconds = c.get("fixed", 0.0)
+    for info in inputs:
+        mp = info.get("pixels", 0) / 1e6
+        per_mp = c.get("per_png_mp", c.get("per_mp", 0.0)) if info.get("format") == "PNG" else c.get("per_mp", 0.0)
+        seconds += (c.get("per_file", 0.0) + per_mp * mp + c.get("per_page", 0.0) * info.get("pages", 0)
+                    + c.get("per_mb", 0.0) * info["bytes"] / MB)
+    return seconds
+
+
+class Decision:
+    """
+    Outcome of admit(): action is "run" (inline), "background" (job queue) or "reject",
+    with the reason for a rejection, the estimated seconds and the per-input header info.
+    """
+
+    def __init__(self, action, reason="", seconds=0.0, inputs=()):
+        self.action = action
+        self.reason = reason
+        self.seconds = seconds
+        self.inputs = list(inputs)
+
+    @property
+    def pages(self):
+        return sum(info.get("pages", 0) for info in self.inputs)
+
+    def __repr__(self):
+        return f"Decision({self.action!r}, {self.reason!r}, seconds={self.seconds:.2f})"
+
+
+def _mb(n):
+    return f"{n / MB:.1f} MB"
+
+
+def admit(tool, uploads, limits=None):
+    """
+    Decide how to run tool on uploads [(name, src)] (bytes, streams or paths) before anything is decoded.
+
+    Sizes come from the uploads, image dimensions and mode from the header, PDF page counts
+    from the trailer. Inputs over the tool's limits are rejected; otherwise the estimated
+    cost decides between running inline and the background queue.
+    """
+    limits = LIMITS.get(tool, {}) if limits is None else limits
+    kind = TOOL_KINDS.get(tool)
+
+    if len(uploads) > limits.get("max_files", len(uploads)):
+        return Decision("reject", f"Too many files ({len(uploads)}); this tool accepts up to {limits['max_files']}.")
+    inputs, total = [], 0
+    for name, src in uploads:
+        size = _size(src)
+        total += size
+        if size > limits.get("max_bytes", size):
+            return Decision("reject", f"{name} is {_mb(size)}; the limit for this tool is {_mb(limits['max_bytes'])}.")
+        if total > limits.get("max_total_bytes", total):
+            return Decision("reject", f"The files add up to more than {_mb(limits['max_total_bytes'])}.")
+        info = dict(inspect_upload(src, kind), name=name, bytes=size)
+        if "error" in info: return Decision("reject", f"{name}: {info['error']}.")
+        if info.get("pixels", 0) > limits.get("max_pixels", info.get("pixels", 0)):
+            return Decision("reject", f"{name} is {info['width']}x{info['height']} ({info['pixels'] / 1e6:.0f} MP); "
+                          f"the limit is {limits['max_pixels'] / 1e6:.0f} MP.")
+        if info.get("decoded_bytes", 0) > limits.get("max_decoded_bytes", info.get("decoded_bytes", 0)):
+            return Decision("reject", f"{name} would need {_mb(info['decoded_bytes'])} of memory once decoded ({info['mode']}); "
+                          f"the limit is {_mb(limits['max_decoded_bytes'])}.")
+        inputs.append(info)
+
+    pages = sum(info.get("pages", 0) for info in inputs)
+    if pages > limits.get("max_pages", pages):
+        return Decision("reject", f"{pages:,} pages is over this tool's limit of {limits['max_pages']:,}.")
+    seconds = estimate_seconds(tool, inputs)
+    if seconds > limits.get("max_seconds", seconds):
+        return Decision("reject", f"This would take about {seconds:.0f}s; the limit is {limits['max_seconds']:.0f}s.", seconds, inputs)
+    return Decision("background" if seconds > SYNC_SECONDS else "run", "", seconds, inputs)
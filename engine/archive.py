@@ -0,0 +1,65 @@
+import io
+import os
+import time
+import zipfile
+import zlib
+
+# Members whose sample deflates to more than this fraction are stored uncompressed
+STORE_RATIO = 0.9
+_SAMPLE = 4 * 1024
+_SAMPLES = 8
+_CHUNK = 1 << 20
+_PRECOMPRESSED = (b"\xff\xd8\xff", b"\x89PNG", b"PK\x03\x04", b"GIF8", b"\x1f\x8b")
+
+
+def is_compressible(data):
+    """Cheap guess: skip known compressed formats, otherwise deflate a few small samples."""
+    view = memoryview(data)
+    if bytes(view[:4]).startswith(_PRECOMPRESSED): return False
+    if bytes(view[:4]) == b"RIFF" and bytes(view[8:12]) == b"WEBP": return False
+    if len(view) <= _SAMPLES * _SAMPLE: samples = [view]
+    else:
+        # Evenly spaced interior samples, so small headers/trailers don't dominate the guess
+        step = len(view) // _SAMPLES
+        samples = [view[i * step + (step - _SAMPLE) // 2:][:_SAMPLE] for i in range(_SAMPLES)]
+    raw = sum(len(s) for s in samples)
+    packed = sum(len(zlib.compress(s, 1)) for s in samples)
+    return raw > 0 and packed < raw * STORE_RATIO
+
+
+def _stream_size(data):
+    """Bytes left in a stream when that is cheap to find out (files on disk, BytesIO), else None."""
+    try:
+        if hasattr(data, "getbuffer"): return data.getbuffer().nbytes - data.tell()
+        return os.fstat(data.fileno()).st_size - data.tell()
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def write_zip(members, dest):
+    """
+    Write members to dest (path or binary file, seekable or not) as they arrive.
+    Members are (name, data) or (name, stream, size): data may be bytes or a readable binary
+    stream; each member is STORED or DEFLATED depending on is_compressible. A streamed member
+    only gets ZIP64 headers when its size is unknown or over the 2 GiB limit (older unzip
+    tools and Office versions reject them otherwise). Returns the member count.
+    """
+    count = 0
+    with zipfile.ZipFile(dest, "w", allowZip64=True) as zf:
+        for name, data, *size in members:
+            zinfo = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            zinfo.external_attr = 0o644 << 16
+            if hasattr(data, "read"):
+                size = size[0] if size else _stream_size(data)
+                if size is not None: zinfo.file_size = size  # lets zipfile decide whether ZIP64 is needed
+                head = data.read(_CHUNK)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED if is_compressible(head) else zipfile.ZIP_STORED
+                with zf.open(zinfo, "w", force_zip64=size is None) as out:
+                    while head:
+                        out.write(head)
+                        head = data.read(_CHUNK)
+            else:
+                zinfo.compress_type = zipfile.ZIP_DEFLATED if is_compressible(data) else zipfile.ZIP_STORED
+                zf.writestr(zinfo, data)
+            count += 1
+    return count
@@ -0,0 +1,133 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from .common import as_stream
+
+ARTIFACT_DIR = os.environ.get("DOCMINT_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "docmint-artifacts"))
+# Results are deleted this many seconds after they were last shown or downloaded
+ARTIFACT_TTL_SECONDS = int(os.environ.get("DOCMINT_ARTIFACT_TTL", "1800"))
+_CLEANUP_INTERVAL = 60
+_ARTIFACT_ID = re.compile(r"[0-9a-f]{32,64}")
+
+
+class ArtifactStore:
+    """
+    Finished tool outputs kept as files under `root` and handed around by id, so sessions
+    hold a short string rather than the result bytes. A file's mtime is its last access:
+    artifacts not touched for `ttl` seconds are deleted (checked at most once a minute).
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, ttl=ARTIFACT_TTL_SECONDS):
+        self.root = root
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self.counters = {"stored": 0, "reused": 0, "linked": 0, "expired": 0}
+
+    def _path(self, artifact_id):
+        return os.path.join(self.root, artifact_id)
+
+    def put(self, data, key=None):
+        """
+        Store data (bytes-like, a BytesIO, a binary stream or a file path) and return its id.
+        With key (e.g. a cache key or job id), an artifact already stored under it is reused
+        without reading data. Files are hard-linked into the store when possible.
+        """
+        self.cleanup()
+        artifact_id = key or uuid.uuid4().hex
+        if not _ARTIFACT_ID.fullmatch(artifact_id): raise ValueError(f"Invalid artifact id: {artifact_id!r}")
+        path = self._path(artifact_id)
+        if key and self.touch(artifact_id):
+            with self._lock: self.counters["reused"] += 1
+            return artifact_id
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            if isinstance(data, (str, os.PathLike)):
+                os.close(fd)
+                os.remove(tmp)
+                try:
+                    os.link(data, tmp)
+                    counter = "linked"
+                except OSError:  # another filesystem
+                    shutil.copyfile(data, tmp)
+                    counter = "stored"
+            else:
+                with os.fdopen(fd, "wb") as fh:
+                    if isinstance(data, (bytes, bytearray, memoryview)): fh.write(data)
+                    elif hasattr(data, "getbuffer"): fh.write(data.getbuffer())
+                    else:
+                        stream = as_stream(data)
+                        shutil.copyfileobj(stream, fh, 1 << 20)
+                        stream.seek(0)
+                counter = "stored"
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp): os.remove(tmp)
+            raise
+        with self._lock: self.counters[counter] += 1
+        return artifact_id
+
+    def touch(self, artifact_id):
+        """Mark an artifact as used now; False if it does not exist (e.g. it expired)."""
+        if not artifact_id or not _ARTIFACT_ID.fullmatch(artifact_id): return False
+        try:
+            os.utime(self._path(artifact_id))
+            return True
+        except OSError:
+            return False
+
+    def size(self, artifact_id):
+        try:
+            return os.path.getsize(self._path(artifact_id))
+        except OSError:
+            return 0
+
+    def open(self, artifact_id):
+        """The artifact as a binary file (caller closes it). Raises FileNotFoundError once it expired."""
+        if not self.touch(artifact_id): raise FileNotFoundError(f"Result {artifact_id} has expired")
+        return open(self._path(artifact_id), "rb")
+
+    def read(self, artifact_id):
+        with self.open(artifact_id) as fh:
+            return fh.read()
+
+    def reader(self, artifact_id):
+        """A callable returning the artifact's bytes, for downloads that are only read when clicked."""
+        return lambda: self.read(artifact_id)
+
+    def cleanup(self, force=False):
+        """Delete artifacts not used for ttl seconds (checked at most once a minute)."""
+        now = time.time()
+        if not force and now - self._last_cleanup < _CLEANUP_INTERVAL: return
+        self._last_cleanup = now
+        for entry in os.scandir(self.root):
+            if not entry.is_file(): continue
+            try:
+                if now - entry.stat().st_mtime < self.ttl: continue
+                os.remove(entry.path)
+            except OSError:
+                continue
+            with self._lock: self.counters["expired"] += 1
+
+    def stats(self):
+        files = [e for e in os.scandir(self.root) if e.is_file() and not e.name.endswith(".tmp")]
+        with self._lock:
+            return dict(self.counters, artifacts=len(files), disk_bytes=sum(e.stat().st_size for e in files))
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """Process-wide artifact store shared by every session."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None: _default_store = ArtifactStore()
+    return _default_store
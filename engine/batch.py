@@ -0,0 +1,148 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain, islice
+import os
+import time
+
+from .archive import write_zip
+from .common import process_pool
+from .images import compress_image_to_target, convert_image, edit_image, open_image, resize_image
+
+
+def _stem(name):
+    return os.path.splitext(name)[0]
+
+
+def _batch_resize(name, data, percent=None, width=None, height=None, fmt="JPG"):
+    img = open_image(data)
+    if percent: w, h = int(img.width * percent / 100), int(img.height * percent / 100)
+    else: w, h = width, height or int(width * img.height / img.width)
+    buf, save_fmt = resize_image(img, max(1, w), max(1, h), fmt)
+    return f"{_stem(name)}.{save_fmt.lower()}", buf.getvalue()
+
+
+def _batch_edit(name, data, angle=0, filt="None"):
+    buf, fmt = edit_image(data, angle, filt)
+    return f"{_stem(name)}.{fmt.lower()}", buf.getvalue()
+
+
+def _batch_convert(name, data, target="PNG"):
+    return f"{_stem(name)}.{target.lower()}", convert_image(data, target).getvalue()
+
+
+def _batch_compress(name, data, target_kb=100):
+    buf, method, _ = compress_image_to_target(data, target_kb)
+    if buf is None: raise ValueError(f"Could not reach {target_kb} KB")
+    return f"{_stem(name)}.jpg", buf.getvalue()
+
+
+BATCH_OPERATIONS = {
+    "resize": _batch_resize,
+    "edit": _batch_edit,
+    "convert": _batch_convert,
+    "compress": _batch_compress,
+}
+
+
+def _run_one(operation, name, data, params):
+    start = time.perf_counter()
+    try:
+        out_name, out = BATCH_OPERATIONS[operation](name, data, **params)
+        return name, out_name, out, None, time.perf_counter() - start
+    except Exception as e:
+        return name, None, None, str(e) or type(e).__name__, time.perf_counter() - start
+
+
+def _size_pool(files, workers):
+    """(worker count capped at the number of files, files) reading at most `workers` of them ahead."""
+    files = iter(files)
+    head = list(islice(files, workers or os.cpu_count() or 1))
+    return len(head) or 1, chain(head, files)
+
+
+def iter_batch(operation, files, params, workers=None):
+    """
+    Run an image operation over (name, bytes) files on a process pool sized to the CPU count.
+
+    Yields (name, out_name, out_bytes, error, seconds) as each file finishes; a failing file
+    yields its error message and does not stop the batch. files may be a lazy iterator: it
+    is read as workers free up, with at most two files per worker in flight, so memory
+    stays flat however large the batch is.
+
+    If a worker dies (out of memory, a crashing decoder), the pool is rebuilt and the files
+    that were in flight are retried one at a time; the one that kills a worker again fails.
+    """
+    workers, files = _size_pool(files, workers)
+    if workers == 1:
+        for name, data in files:
+            yield _run_one(operation, name, data, params)
+        return
+
+    suspects, running = deque(), {}  # future -> (name, data, retried alone)
+    pool = process_pool(workers)
+    try:
+        while True:
+            if suspects:
+                if not running:
+                    name, data = suspects.popleft()
+                    running[pool.submit(_run_one, operation, name, data, params)] = (name, data, True)
+            else:
+                for name, data in islice(files, max(workers * 2 - len(running), 0)):
+                    running[pool.submit(_run_one, operation, name, data, params)] = (name, data, False)
+            if not running: return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = any(isinstance(f.exception(), BrokenProcessPool) for f in done)
+            # Every job in flight fails with the pool: collect them all before starting a new one
+            if broken: done, _ = wait(running)
+            for future in done:
+                name, data, retried = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    if not retried:
+                        suspects.append((name, data))
+                        continue
+                    result = name, None, None, "Processing crashed (out of memory or a malformed image)", 0.0
+                yield result
+            if broken:
+                pool.shutdown(wait=False)
+                pool = process_pool(workers)
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def batch_to_zip(operation, files, params, dest, workers=None, on_result=None):
+    """
+    Run iter_batch and stream every successful output into a ZIP at dest.
+    on_result(index, result) is called after each file (e.g. to drive a progress bar).
+
+    Returns a summary: files "done", "failed" [(name, error)], wall "seconds", "workers"
+    and "throughput" in images per second per core.
+    """
+    workers, files = _size_pool(files, workers)
+    failed, seen = [], set()
+    start = time.perf_counter()
+
+    def members():
+        for i, result in enumerate(iter_batch(operation, files, params, workers)):
+            name, out_name, out, error, _ = result
+            if on_result: on_result(i, result)
+            if error:
+                failed.append((name, error))
+                continue
+            # Different inputs can map to the same output name (a.png, a.jpg -> a.jpg)
+            base, ext = os.path.splitext(out_name)
+            n = 1
+            while out_name in seen:
+                out_name = f"{base}_{n}{ext}"
+                n += 1
+            seen.add(out_name)
+            yield out_name, out
+
+    done = write_zip(members(), dest)
+    seconds = time.perf_counter() - start
+    return {
+        "done": done, "failed": failed, "seconds": seconds, "workers": workers,
+        "throughput": done / seconds / workers if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from .common import as_stream
+
+CACHE_DIR = os.environ.get("DOCMINT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "docmint-cache"))
+CACHE_MEMORY_BYTES = int(os.environ.get("DOCMINT_CACHE_MEMORY_MB", "256")) * 1024 * 1024
+CACHE_DISK_BYTES = int(os.environ.get("DOCMINT_CACHE_DISK_MB", "2048")) * 1024 * 1024
+# Results larger than this skip the memory tier (they would evict everything else)
+CACHE_MEMORY_MAX_ITEM = CACHE_MEMORY_BYTES // 8
+
+
+def _digest_input(h, src):
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        h.update(src)
+    elif hasattr(src, "getbuffer"):
+        h.update(src.getbuffer())
+    else:
+        stream = as_stream(src)
+        for chunk in iter(lambda: stream.read(1 << 20), b""): h.update(chunk)
+        stream.seek(0)
+
+
+def cache_key(operation, inputs, params=None):
+    """Hash of the input bytes (in order) plus the operation name and normalized parameters."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps([operation, params or {}], sort_keys=True, default=str).encode())
+    for src in inputs:
+        h.update(b"\0")
+        _digest_input(h, src)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of (payload bytes, JSON-able meta) results.
+
+    The memory tier is an LRU bounded by payload bytes; the disk tier keeps one file per key
+    under `disk_dir`, bounded by total size with least-recently-used files evicted first, so
+    results survive restarts. Counters are exposed by stats().
+    """
+
+    def __init__(self, memory_bytes=CACHE_MEMORY_BYTES, disk_dir=CACHE_DIR, disk_bytes=CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_used = sum(e.stat().st_size for e in os.scandir(disk_dir) if e.is_file())
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key)
+
+    def _remember(self, key, entry):
+        size = len(entry[0])
+        if size > min(CACHE_MEMORY_MAX_ITEM, self.memory_bytes): return
+        if key in self._memory: self._memory_used -= len(self._memory.pop(key)[0])
+        self._memory[key] = entry
+        self._memory_used += size
+        while self._memory_used > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_used -= len(old[0])
+            self.counters["evictions"] += 1
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters["hits"] += 1
+                return self._memory[key]
+        entry = self._read_disk(key) if self.disk_dir else None
+        with self._lock:
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["hits"] += 1
+            self.counters["disk_hits"] += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, payload, meta=None):
+        entry = (bytes(payload), meta or {})
+        with self._lock:
+            self._remember(key, entry)
+        if self.disk_dir: self._write_disk(key, entry)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached (payload, meta) for key, or run compute() and cache a non-None payload."""
+        entry = self.get(key)
+        if entry is not None: return entry
+        payload, meta = compute()
+        if payload is not None: self.put(key, payload, meta)
+        return payload, meta
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, memory_items=len(self._memory), memory_bytes=self._memory_used,
+                        disk_bytes=self._disk_used if self.disk_dir else 0)
+
+    # --- disk tier: [4-byte meta length][meta json][payload] ---
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), "rb") as fh:
+                n = int.from_bytes(fh.read(4), "big")
+                meta = json.loads(fh.read(n))
+                payload = fh.read()
+            os.utime(self._path(key))  # mtime doubles as last-access time for eviction
+            return payload, meta
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        payload, meta = entry
+        meta_bytes = json.dumps(meta, default=str).encode()
+        size = 4 + len(meta_bytes) + len(payload)
+        if size > self.disk_bytes: return
+        fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(len(meta_bytes).to_bytes(4, "big"))
+                fh.write(meta_bytes)
+                fh.write(payload)
+            existed = os.path.exists(self._path(key))
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if os.path.exists(tmp): os.remove(tmp)
+            return
+        with self._lock:
+            if not existed: self._disk_used += size
+            if self._disk_used > self.disk_bytes: self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted((e for e in os.scandir(self.disk_dir) if e.is_file() and not e.name.endswith(".tmp")),
+                         key=lambda e: e.stat().st_mtime)
+        self._disk_used = sum(e.stat().st_size for e in entries)
+        for e in entries:
+            if self._disk_used <= self.disk_bytes * 0.9: break
+            size = e.stat().st_size
+            try:
+                os.remove(e.path)
+            except OSError:
+                continue
+            self._disk_used -= size
+            self.counters["disk_evictions"] += 1
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide cache shared by every session."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None: _default_cache = ResultCache()
+    return _default_cache
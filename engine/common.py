@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from io import BytesIO
+import os
+import shutil
+import tempfile
+
+
+def as_stream(src):
+    """Return a readable, rewound stream for raw bytes or an existing file-like object."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return BytesIO(src)
+    if hasattr(src, "seek"):
+        src.seek(0)
+    return src
+
+
+def read_bytes(src):
+    if isinstance(src, (bytes, bytearray)):
+        return bytes(src)
+    if isinstance(src, memoryview):
+        return src.tobytes()
+    return as_stream(src).read()
+
+
+def spool(src, dir=None):
+    """Open src for reading without loading it: paths are opened, non-seekable streams go to a temp file."""
+    if isinstance(src, (str, os.PathLike)): return open(src, "rb")
+    if hasattr(src, "seek") and src.seekable():
+        src.seek(0)
+        return src
+    tmp = tempfile.TemporaryFile(dir=dir)
+    shutil.copyfileobj(src, tmp, 1 << 20)
+    tmp.seek(0)
+    return tmp
+
+
+@contextmanager
+def spooled(src, dir=None):
+    """spool() for a with block: a file or temp file it opened is closed at the end; src itself never is."""
+    stream = spool(src, dir)
+    try:
+        yield stream
+    finally:
+        if stream is not src: stream.close()
+
+
+def process_pool(workers, **kwargs):
+    """
+    ProcessPoolExecutor whose workers are not forked from this process: forking a threaded
+    server (Streamlit, the job queue) can copy a lock held by another thread into the child.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method), **kwargs)
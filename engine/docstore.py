@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+# Default per-session budget for parsed documents kept between reruns
+DOCSTORE_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+def image_cost(img):
+    return img.width * img.height * len(img.getbands())
+
+
+def upload_id(uploaded):
+    """Stable identity for an upload: Streamlit's file_id when present, else name and size."""
+    return getattr(uploaded, "file_id", None) or f"{getattr(uploaded, 'name', '')}:{getattr(uploaded, 'size', '')}"
+
+
+class DocumentStore:
+    """
+    Keeps parsed documents (PdfReader, decoded images, ...) between UI reruns.
+
+    Each slot (e.g. "split_pdf") holds the object parsed from one upload; a different
+    upload in the same slot replaces it. Slots are evicted least-recently-used once the
+    summed cost estimate exceeds the budget. counters["reused"] is how often a parse was
+    avoided.
+    """
+
+    def __init__(self, budget_bytes=DOCSTORE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._slots = OrderedDict()  # slot -> (source id, object, cost)
+        self._used = 0
+        self.counters = {"parsed": 0, "reused": 0, "evictions": 0}
+
+    def get(self, slot, source_id, load, cost=lambda obj: 0):
+        entry = self._slots.get(slot)
+        if entry is not None and entry[0] == source_id:
+            self._slots.move_to_end(slot)
+            self.counters["reused"] += 1
+            return entry[1]
+        if entry is not None: self.discard(slot)
+
+        obj = load()
+        size = cost(obj)
+        self.counters["parsed"] += 1
+        if size <= self.budget_bytes:
+            self._slots[slot] = (source_id, obj, size)
+            self._used += size
+            while self._used > self.budget_bytes:
+                old = next(iter(self._slots))
+                self.discard(old)
+                self.counters["evictions"] += 1
+        return obj
+
+    def discard(self, slot):
+        entry = self._slots.pop(slot, None)
+        if entry is not None: self._used -= entry[2]
+
+    def stats(self):
+        return dict(self.counters, slots=len(self._slots), bytes=self._used)
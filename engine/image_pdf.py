@@ -0,0 +1,162 @@
+from io import BytesIO
+import os
+import zlib
+
+from PIL import Image, ImageOps
+from PyPDF2.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject, StreamObject
+
+from .common import read_bytes
+from .images import open_image
+from .metrics import phase, record
+from .pdf_stream import PdfStreamWriter
+
+PAGE_SIZES = {"A4": (595.28, 841.89), "Letter": (612.0, 792.0)}
+# Margin (points) around images placed on a fixed page size
+PAGE_MARGIN = 36
+# Quality for JPEGs that have to be re-encoded (downsampled or mirrored)
+REENCODE_QUALITY = 90
+
+_COLORSPACES = {"RGB": "/DeviceRGB", "L": "/DeviceGray", "CMYK": "/DeviceCMYK"}
+# Pillow reports multi-picture JPEGs (written by many phone cameras) as MPO
+_JPEG_FORMATS = ("JPEG", "MPO")
+_MP_ENTRY = 0xB002
+_ORIENTATION = 0x0112
+# EXIF orientations that are plain rotations (degrees clockwise), drawn by the page matrix
+_ROTATIONS = {1: 0, 3: 180, 6: 90, 8: 270}
+
+
+def _num(v):
+    return f"{v:.3f}".rstrip("0").rstrip(".")
+
+
+def _placement(rotation, x, y, w, h):
+    """cm matrix drawing the image's unit square into the w x h box at (x, y), rotated for display."""
+    if rotation == 90: return (0, -h, w, 0, x, y + h)
+    if rotation == 180: return (-w, 0, 0, -h, x + w, y + h)
+    if rotation == 270: return (0, h, -w, 0, x + w, y)
+    return (w, 0, 0, h, x, y)
+
+
+def _pdf_mode(img):
+    if img.mode in _COLORSPACES: return img
+    return img.convert("L" if img.mode in ("1", "LA", "I", "I;16") else "RGB")
+
+
+def _primary_jpeg(img, data):
+    """The first image of an MPO file (the photo itself); later frames such as previews are dropped."""
+    try:
+        size = img.mpinfo[_MP_ENTRY][0]["Size"]
+    except (AttributeError, KeyError, IndexError, TypeError):
+        return data
+    return data[:size] if 0 < size <= len(data) else data
+
+
+def _image_stream(img, src, passthrough, jpeg):
+    """Image XObject for img: the source JPEG bytes as-is, or its pixels (JPEG again for photos, else Flate)."""
+    xobj = StreamObject()
+    inverted = False
+    if passthrough:
+        xobj._data = read_bytes(src)
+        if img.format == "MPO": xobj._data = _primary_jpeg(img, xobj._data)
+        xobj[NameObject("/Filter")] = NameObject("/DCTDecode")
+        inverted = img.mode == "CMYK" and "adobe" in img.info
+    else:
+        img = _pdf_mode(img)
+        if jpeg:
+            buf = BytesIO()
+            img.save(buf, format="JPEG", quality=REENCODE_QUALITY)
+            xobj._data = buf.getvalue()
+            xobj[NameObject("/Filter")] = NameObject("/DCTDecode")
+            # Pillow always writes CMYK JPEGs the Adobe way
+            inverted = img.mode == "CMYK"
+        else:
+            xobj._data = zlib.compress(img.tobytes(), 6)
+            xobj[NameObject("/Filter")] = NameObject("/FlateDecode")
+    xobj.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(img.width),
+        NameObject("/Height"): NumberObject(img.height),
+        NameObject("/ColorSpace"): NameObject(_COLORSPACES[img.mode]),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+    })
+    # Adobe CMYK JPEGs store inverted values
+    if inverted:
+        xobj[NameObject("/Decode")] = ArrayObject(NumberObject(v) for v in (1, 0) * 4)
+    return xobj
+
+
+def add_image_page(writer, src, page_size=None, dpi=None):
+    """
+    Append one page showing the image src to a PdfStreamWriter.
+
+    Without page_size the page is the image's size at `dpi` (default 72, one pixel per point).
+    With page_size ("A4", "Letter") the image is fitted inside the margins, the page turned
+    to match its orientation, and `dpi` is the highest resolution kept: larger images are
+    downsampled. JPEGs that need no change are embedded without re-encoding.
+    """
+    with phase("parse"):
+        img = open_image(src)
+        jpeg = img.format in _JPEG_FORMATS
+        rotation = _ROTATIONS.get(img.getexif().get(_ORIENTATION, 1))
+    record(pixels=img.width * img.height)
+    if rotation is None:
+        # Mirrored orientations cannot be expressed as a rotation, so the pixels are transposed
+        with phase("process"):
+            img, rotation = ImageOps.exif_transpose(img), 0
+    shown_w, shown_h = (img.height, img.width) if rotation in (90, 270) else img.size
+
+    if page_size:
+        page_w, page_h = PAGE_SIZES[page_size]
+        if shown_w > shown_h: page_w, page_h = page_h, page_w
+        scale = min((page_w - 2 * PAGE_MARGIN) / shown_w, (page_h - 2 * PAGE_MARGIN) / shown_h)
+        if dpi and 72 / scale > dpi:
+            size = (max(1, round(img.width * scale * dpi / 72)), max(1, round(img.height * scale * dpi / 72)))
+            with phase("process"):
+                if jpeg: img.draft(img.mode, size)
+                img = _pdf_mode(img).resize(size, Image.Resampling.LANCZOS)
+    else:
+        scale = 72 / dpi if dpi else 1.0
+        page_w, page_h = shown_w * scale, shown_h * scale
+
+    passthrough = img.format in _JPEG_FORMATS and img.mode in _COLORSPACES
+    with phase("encode"):
+        image = writer.add_object(_image_stream(img, src, passthrough, jpeg))
+    img.close()
+
+    w, h = shown_w * scale, shown_h * scale
+    matrix = _placement(rotation, (page_w - w) / 2, (page_h - h) / 2, w, h)
+    content = StreamObject()
+    content._data = f"q {' '.join(_num(v) for v in matrix)} cm /Im0 Do Q".encode()
+    writer.add_page(DictionaryObject({
+        NameObject("/Type"): NameObject("/Page"),
+        NameObject("/MediaBox"): ArrayObject([NumberObject(0), NumberObject(0), FloatObject(_num(page_w)), FloatObject(_num(page_h))]),
+        NameObject("/Resources"): DictionaryObject({
+            NameObject("/XObject"): DictionaryObject({NameObject("/Im0"): image}),
+        }),
+        NameObject("/Contents"): writer.add_object(content),
+    }))
+
+
+def images_to_pdf_file(sources, dest, page_size=None, dpi=None, on_progress=None):
+    """
+    Write one page per image (paths or streams) to dest (path or binary file), streaming:
+    only the current image is held in memory. on_progress(done, total) is called after each
+    image. Returns the page count.
+    """
+    sources = list(sources)
+    out = open(dest, "wb") if isinstance(dest, (str, os.PathLike)) else dest
+    try:
+        writer = PdfStreamWriter(out)
+        for i, src in enumerate(sources):
+            if isinstance(src, (str, os.PathLike)):
+                with open(src, "rb") as fh:
+                    add_image_page(writer, fh, page_size, dpi)
+            else:
+                add_image_page(writer, src, page_size, dpi)
+            if on_progress: on_progress(i + 1, len(sources))
+        writer.close()
+        record(pages=len(writer.kids))
+        return len(writer.kids)
+    finally:
+        if out is not dest: out.close()
@@ -0,0 +1,197 @@
+from io import BytesIO
+import math
+
+from PIL import Image, ImageOps, ImageFilter
+
+from .common import as_stream
+from .metrics import phase, record
+
+# Target-size solver tuning
+PROXY_PIXELS = 1_000_000
+MIN_QUALITY = 30
+MAX_PROBES = 7
+CLOSE_ENOUGH = 0.9
+
+# Bounding box for on-screen previews (2x the 300 px display width for HiDPI screens)
+PREVIEW_SIZE = (600, 600)
+
+FILTERS = {
+    "Blur": ImageFilter.BLUR,
+    "Sharpen": ImageFilter.SHARPEN,
+    "Contour": ImageFilter.CONTOUR,
+}
+
+
+def open_image(src):
+    if isinstance(src, Image.Image): return src
+    return Image.open(as_stream(src))
+
+
+def make_preview(src, size=PREVIEW_SIZE):
+    """
+    Small proxy of an image for display. Returns (preview, original size, original format).
+
+    Only the header is read for size/format, and JPEGs are decoded in draft mode at
+    1/2-1/8 scale, so a 50 MP photo never has to be decoded at full resolution.
+    """
+    img = src.copy() if isinstance(src, Image.Image) else open_image(src)
+    original_size, fmt = img.size, img.format
+    if fmt == "JPEG": img.draft(img.mode, size)
+    img.thumbnail(size)
+    if img.mode not in ("RGB", "RGBA", "L"): img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return img, original_size, fmt
+
+
+def save_format(fmt):
+    return "JPEG" if fmt.upper() in ("JPG", "JPEG") else fmt.upper()
+
+
+def _jpeg_ready(img):
+    if img.mode not in ("RGB", "L", "CMYK"): img = img.convert("RGB")
+    img.load()
+    return img
+
+
+def _encode_jpeg(img, quality, optimize=False):
+    buf = BytesIO()
+    with phase("encode"):
+        img.save(buf, format="JPEG", quality=quality, optimize=optimize)
+    return buf
+
+
+def compress_image_to_target(src, target_kb, min_quality=MIN_QUALITY):
+    """
+    Encode src as a JPEG no larger than target_kb, preferring quality over downscaling.
+
+    Every probe is a full-size optimize=True encode, so whether a quality fits is judged on
+    the file that is returned. For images over PROXY_PIXELS the first probes are predicted
+    from a small proxy (smaller images are bisected); once the answer is bracketed, the next
+    quality is interpolated between the two real sizes, falling back to bisection when a
+    guess does not halve the bracket. Once a quality fits, the search stops at CLOSE_ENOUGH
+    of the target or after MAX_PROBES; the image is only scaled down after min_quality
+    failed, and quality is searched again at the smaller size.
+
+    Returns (buffer, method, encodes) where encodes counts full-size JPEG encodes, or
+    (None, "Failed", encodes) if no scale >= 10% fits.
+    """
+    with phase("parse"):
+        img = _jpeg_ready(open_image(src))
+    target_bytes = target_kb * 1024
+    width, height = img.size
+    record(pixels=width * height)
+    encodes = 0
+
+    # 1. Cheap size model: bytes-per-pixel of a ~1 MP proxy, corrected by the
+    #    full-size/proxy ratio measured at the nearest probed quality
+    proxy = None
+    if width * height > PROXY_PIXELS:
+        f = (PROXY_PIXELS / (width * height)) ** 0.5
+        with phase("process"):
+            proxy = img.resize((max(1, int(width * f)), max(1, int(height * f))), Image.Resampling.BILINEAR)
+    proxy_bpp = {}
+
+    def estimate(quality, pixels, ratios):
+        if quality not in proxy_bpp:
+            proxy_bpp[quality] = _encode_jpeg(proxy, quality, optimize=True).tell() / (proxy.width * proxy.height)
+        ratio = ratios[min(ratios, key=lambda q: abs(q - quality))] if ratios else 1.0
+        return proxy_bpp[quality] * ratio * pixels
+
+    def predict(low, high, pixels, ratios):
+        if proxy is None: return (low + high) // 2
+        best = None
+        while low <= high:
+            mid = (low + high) // 2
+            if estimate(mid, pixels, ratios) <= target_bytes:
+                best, low = mid, mid + 1
+            else:
+                high = mid - 1
+        return best
+
+    # 2. Bracket quality with real encodes at the model's guesses; shrink if min_quality fails
+    scale, candidate, ratios = 1.0, img, {}
+    while True:
+        pixels = candidate.width * candidate.height
+        fits = fails = best = None
+        probes, span = 0, None
+        while True:
+            low = fits + 1 if fits else min_quality
+            high = fails - 1 if fails else 95
+            if low > high or (fits and (probes >= MAX_PROBES or best.tell() >= CLOSE_ENOUGH * target_bytes)): break
+            if span is not None and high - low >= span / 2: guess = (low + high) // 2
+            elif fits and fails:
+                # Sizes grow roughly exponentially with quality between two real encodes
+                step = math.log(target_bytes / best.tell()) / math.log(over / best.tell())
+                guess = min(max(fits + int(step * (fails - fits)), low), high)
+            elif proxy is not None: guess = predict(low, high, pixels, ratios) or low
+            else: guess = (low + high) // 2
+            span = high - low
+            probes += 1
+
+            buf = _encode_jpeg(candidate, guess, optimize=True)
+            encodes += 1
+            if proxy is not None: ratios[guess] = buf.tell() / estimate(guess, pixels, {})
+            if buf.tell() <= target_bytes: fits, best = guess, buf
+            else: fails, over = guess, buf.tell()
+
+        if fits:
+            method = "Quality Optimized" if scale == 1.0 else f"Resized to {int(scale*100)}%"
+            return best, method, encodes
+
+        # min_quality failed here; smaller images compress worse per pixel, so shrink a little past the area ratio
+        if scale <= 0.1: break
+        scale = max(scale * min((target_bytes / over) ** 0.6 * 0.95, 0.9), 0.1)
+        with phase("process"):
+            candidate = img.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.Resampling.LANCZOS)
+
+    return None, "Failed", encodes
+
+
+def resize_image(src, width, height, fmt="JPG"):
+    """Resize to (width, height) and encode as fmt. Returns (buffer, save format)."""
+    with phase("parse"):
+        img = open_image(src)
+        img.load()
+    record(pixels=img.width * img.height)
+    with phase("process"):
+        new_img = img.resize((width, height), Image.Resampling.LANCZOS)
+    save_fmt = save_format(fmt)
+    if save_fmt == "JPEG" and new_img.mode in ("RGBA", "P"): new_img = new_img.convert("RGB")
+    b = BytesIO()
+    with phase("encode"):
+        new_img.save(b, format=save_fmt, quality=95)
+    return b, save_fmt
+
+
+def apply_edits(img, angle=0, filt="None"):
+    processed = img.copy()
+    if angle: processed = processed.rotate(angle, expand=True)
+    if filt == "Grayscale": processed = ImageOps.grayscale(processed)
+    elif filt in FILTERS: processed = processed.filter(FILTERS[filt])
+    return processed
+
+
+def edit_image(src, angle=0, filt="None"):
+    """Rotate/filter an image and re-encode in its source format. Returns (buffer, format)."""
+    with phase("parse"):
+        img = open_image(src)
+        img.load()
+    record(pixels=img.width * img.height)
+    with phase("process"):
+        processed = apply_edits(img, angle, filt)
+    fmt = img.format if img.format else "PNG"
+    b = BytesIO()
+    with phase("encode"):
+        processed.save(b, format=fmt)
+    return b, fmt
+
+
+def convert_image(src, target):
+    with phase("parse"):
+        i = open_image(src)
+        i.load()
+    record(pixels=i.width * i.height)
+    if target == "JPEG" and i.mode == "RGBA": i = i.convert("RGB")
+    b = BytesIO()
+    with phase("encode"):
+        i.save(b, format=target)
+    return b
@@ -0,0 +1,310 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from .cache import get_result_cache
+from .common import as_stream
+from .metrics import OperationCancelled, record, track
+
+JOB_DIR = os.environ.get("DOCMINT_JOB_DIR", os.path.join(tempfile.gettempdir(), "docmint-jobs"))
+JOB_WORKERS = int(os.environ.get("DOCMINT_JOB_WORKERS", "2"))
+# Finished jobs and their results are deleted this many seconds after they end
+JOB_TTL_SECONDS = int(os.environ.get("DOCMINT_JOB_TTL", "3600"))
+ACTIVE_STATES = ("queued", "running")
+_PROGRESS_INTERVAL = 0.25
+_CLEANUP_INTERVAL = 60
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class JobCancelled(OperationCancelled):
+    """Raised inside a running job (from Job.progress) once cancellation was requested."""
+
+
+class Job:
+    """Handle given to a job function: where to write output and how to report progress."""
+
+    def __init__(self, queue, job_id):
+        self.queue = queue
+        self.id = job_id
+
+    def path(self, name):
+        return os.path.join(self.queue._dir(self.id), name)
+
+    def progress(self, done, total, message=""):
+        self.queue._progress(self.id, done, total, message)
+
+
+# --- job functions: (job, input paths, **params) -> (result file name, JSON-able meta) ---
+# Each imports its engine module when it first runs, so the queue itself is cheap to import.
+def _job_merge(job, inputs):
+    from .pdf_stream import merge_pdfs_to_file
+    pages = merge_pdfs_to_file(inputs, job.path("merged.pdf"), on_progress=job.progress)
+    return "merged.pdf", {"pages": pages}
+
+
+def _job_merge_pptx(job, inputs):
+    from .pptx_merge import merge_pptx_to_file
+    summary = merge_pptx_to_file(inputs, job.path("merged.pptx"), on_progress=job.progress)
+    return "merged.pptx", summary
+
+
+def _job_split(job, inputs, groups):
+    from .pdf_split import split_pdf_to_zip
+    count = split_pdf_to_zip(inputs[0], job.path("split.zip"), groups, on_progress=job.progress)
+    return "split.zip", {"files": count}
+
+
+def _job_page_ops(job, inputs, operations):
+    from .page_ops import apply_page_ops
+    count = apply_page_ops(inputs[0], operations, job.path("organized.pdf"), on_progress=job.progress)
+    return "organized.pdf", {"pages": count}
+
+
+def _job_compress_pdf(job, inputs, level="Medium"):
+    from .pdf_compress import compress_pdf
+    out, report = compress_pdf(inputs[0], level, on_progress=job.progress)
+    with open(job.path("compressed.pdf"), "wb") as fh:
+        fh.write(out.getbuffer())
+    return "compressed.pdf", report
+
+
+def _job_notebook_to_pdf(job, inputs):
+    from .notebook import get_renderer
+    job.progress(0, 1, "rendering")
+    with open(inputs[0], "rb") as fh:
+        pdf_bytes, status = get_renderer().convert(fh)
+    if pdf_bytes is None: raise RuntimeError(status)
+    with open(job.path("notebook.pdf"), "wb") as fh:
+        fh.write(pdf_bytes)
+    job.progress(1, 1)
+    return "notebook.pdf", {"status": status}
+
+
+def _job_images_to_pdf(job, inputs, page_size=None, dpi=None):
+    from .image_pdf import images_to_pdf_file
+    pages = images_to_pdf_file(inputs, job.path("images.pdf"), page_size, dpi, on_progress=job.progress)
+    return "images.pdf", {"pages": pages}
+
+
+def _input_name(path):
+    return os.path.basename(path)[5:]  # drop the "0000_" ordering prefix added by submit()
+
+
+def _job_image(job, inputs, operation, params):
+    """A single-image tool run that was too large to run inline."""
+    from .batch import BATCH_OPERATIONS
+    job.progress(0, 1, "processing")
+    with open(inputs[0], "rb") as fh:
+        name, out = BATCH_OPERATIONS[operation](_input_name(inputs[0]), fh.read(), **params)
+    with open(job.path(name), "wb") as fh:
+        fh.write(out)
+    job.progress(1, 1)
+    return name, {"name": name}
+
+
+def _job_batch(job, inputs, operation, params):
+    from .batch import batch_to_zip
+
+    def files():
+        for path in inputs:
+            with open(path, "rb") as fh:
+                yield _input_name(path), fh.read()
+    summary = batch_to_zip(operation, files(), params, job.path("batch.zip"),
+                           on_result=lambda i, result: job.progress(i + 1, len(inputs), result[0]))
+    return "batch.zip", summary
+
+
+JOB_OPERATIONS = {
+    "merge": _job_merge,
+    "merge_pptx": _job_merge_pptx,
+    "split": _job_split,
+    "page_ops": _job_page_ops,
+    "compress_pdf": _job_compress_pdf,
+    "notebook_to_pdf": _job_notebook_to_pdf,
+    "images_to_pdf": _job_images_to_pdf,
+    "image": _job_image,
+    "batch": _job_batch,
+}
+
+
+class JobQueue:
+    """
+    Runs long operations on a local thread pool instead of inside the Streamlit script.
+
+    Each job gets a directory under `root` with its inputs, its result file and a state.json
+    (status, progress, error, result name and meta). A job id can therefore be polled from
+    any rerun, or after the browser reconnects. Cancellation is cooperative: the job stops
+    at its next progress report. Finished jobs are deleted `ttl` seconds after they end.
+    """
+
+    def __init__(self, root=JOB_DIR, workers=JOB_WORKERS, ttl=JOB_TTL_SECONDS):
+        self.root = root
+        self.workers = workers
+        self.ttl = ttl
+        os.makedirs(root, exist_ok=True)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="docmint-job")
+        self._lock = threading.Lock()
+        self._live = {}      # job id -> state, for jobs started by this process
+        self._futures = {}
+        self._cancel = set()
+        self._saved = {}     # job id -> time state.json was last written
+        self._last_cleanup = 0.0
+
+    def _dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def submit(self, operation, inputs, params=None, label="", cache_key=None, profile=False, meta=None):
+        """
+        Copy inputs [(name, bytes or stream)] into a new job directory and queue the operation.
+        With cache_key, a successful result is also stored in the shared result cache; with
+        profile, the job runs under the profiler and its report is kept in the job state.
+        meta (e.g. which upload the job belongs to) is kept in the state and extended with the
+        job's own meta when it is done. Returns the job id.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self._dir(job_id), "inputs"))
+        paths = []
+        for i, (name, src) in enumerate(inputs):
+            path = os.path.join(self._dir(job_id), "inputs", f"{i:04d}_{os.path.basename(name)}")
+            with open(path, "wb") as fh:
+                if isinstance(src, (bytes, bytearray, memoryview)): fh.write(src)
+                else: shutil.copyfileobj(as_stream(src), fh, 1 << 20)
+            paths.append(path)
+
+        state = {
+            "id": job_id, "operation": operation, "label": label, "status": "queued",
+            "done": 0, "total": 0, "message": "", "error": None, "result": None, "meta": dict(meta or {}), "profile": None,
+            "created": time.time(), "started": None, "finished": None,
+        }
+        with self._lock:
+            self._live[job_id] = state
+            self._futures[job_id] = self._pool.submit(self._run, job_id, operation, paths, params or {}, cache_key, profile)
+        self._save(state)
+        return job_id
+
+    def _run(self, job_id, operation, paths, params, cache_key, profile):
+        try:
+            if job_id in self._cancel: raise JobCancelled()
+            self._update(job_id, status="running", started=time.time())
+            with track(operation, profile, input_bytes=sum(os.path.getsize(p) for p in paths)) as op:
+                result, meta = JOB_OPERATIONS[operation](Job(self, job_id), paths, **params)
+                record(output_bytes=os.path.getsize(os.path.join(self._dir(job_id), result)))
+            if cache_key:
+                with open(os.path.join(self._dir(job_id), result), "rb") as fh:
+                    get_result_cache().put(cache_key, fh.read(), meta)
+            self._update(job_id, status="done", result=result, meta=dict(self.status(job_id)["meta"], **meta), profile=op.profile)
+        except JobCancelled:
+            self._update(job_id, status="cancelled")
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e) or type(e).__name__)
+        finally:
+            shutil.rmtree(os.path.join(self._dir(job_id), "inputs"), ignore_errors=True)
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel.discard(job_id)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            state = self._live[job_id]
+            state.update(fields)
+            if state["status"] not in ACTIVE_STATES: state["finished"] = time.time()
+            snapshot = dict(state)
+        self._save(snapshot)
+
+    def _progress(self, job_id, done, total, message):
+        if job_id in self._cancel: raise JobCancelled()
+        with self._lock:
+            self._live[job_id].update(done=done, total=total, message=message)
+            # state.json is only a fallback for other processes, so progress writes are throttled
+            if done < total and time.time() - self._saved.get(job_id, 0) < _PROGRESS_INTERVAL: return
+            snapshot = dict(self._live[job_id])
+        self._save(snapshot)
+
+    def _save(self, state):
+        path = os.path.join(self._dir(state["id"]), "state.json")
+        fd, tmp = tempfile.mkstemp(dir=self._dir(state["id"]), suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(state, fh, default=str)
+        os.replace(tmp, path)
+        self._saved[state["id"]] = time.time()
+
+    def _load(self, job_id):
+        try:
+            with open(os.path.join(self._dir(job_id), "state.json")) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def status(self, job_id):
+        """Current state dict of a job, or None if the id is unknown or expired."""
+        if not job_id or not _JOB_ID.fullmatch(job_id): return None
+        with self._lock:
+            if job_id in self._live: return dict(self._live[job_id])
+        state = self._load(job_id)
+        if state and state["status"] in ACTIVE_STATES:
+            # Started by a process that has since exited (e.g. a server restart)
+            state.update(status="failed", error="Interrupted by a server restart", finished=time.time())
+            self._save(state)
+        return state
+
+    def result_path(self, job_id):
+        state = self.status(job_id)
+        if not state or state["status"] != "done": return None
+        return os.path.join(self._dir(job_id), state["result"])
+
+    def cancel(self, job_id):
+        """Request cancellation; a queued job is dropped at once, a running one at its next progress report."""
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is None: return False
+            self._cancel.add(job_id)
+        if future.cancel():
+            self._update(job_id, status="cancelled")
+            shutil.rmtree(os.path.join(self._dir(job_id), "inputs"), ignore_errors=True)
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancel.discard(job_id)
+        return True
+
+    def cleanup(self, force=False):
+        """Delete jobs that finished more than ttl seconds ago (checked at most once a minute)."""
+        now = time.time()
+        if not force and now - self._last_cleanup < _CLEANUP_INTERVAL: return
+        self._last_cleanup = now
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or not _JOB_ID.fullmatch(entry.name): continue
+            with self._lock:
+                if entry.name in self._futures: continue
+            state = self._load(entry.name)
+            ended = (state or {}).get("finished") or (state or {}).get("created") or entry.stat().st_mtime
+            if now - ended < self.ttl: continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            with self._lock:
+                self._live.pop(entry.name, None)
+                self._saved.pop(entry.name, None)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for state in self._live.values():
+                counts[state["status"]] = counts.get(state["status"], 0) + 1
+        return dict(counts, workers=self.workers)
+
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide job queue shared by every session."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None: _default_queue = JobQueue()
+    return _default_queue
@@ -0,0 +1,273 @@
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+PHASES = ("parse", "process", "encode", "serialize")
+COUNTS = ("input_bytes", "output_bytes", "pages", "pixels")
+PROFILE_DIR = os.environ.get("DOCMINT_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "docmint-profiles"))
+# "cprofile" (default) or "pyinstrument" when that package is installed
+PROFILER = os.environ.get("DOCMINT_PROFILER", "cprofile")
+PROFILE_LINES = 25
+# Address the metrics endpoint listens on; "0.0.0.0" lets Prometheus scrape it from outside a container
+METRICS_HOST = os.environ.get("DOCMINT_METRICS_HOST", "127.0.0.1")
+
+_current = contextvars.ContextVar("docmint_operation", default=None)
+
+
+class OperationCancelled(Exception):
+    """Raised (or subclassed) to end a tracked operation as cancelled rather than failed."""
+
+
+def _rss_bytes():
+    """Current resident set size (Linux); 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class Operation:
+    """Measurements for one run of a tool operation, filled in by track(), phase() and record()."""
+
+    def __init__(self, name):
+        self.name = name
+        self.phases = {}
+        self.counts = dict.fromkeys(COUNTS, 0)
+        self.cache_hit = False
+        self.error = None
+        self.cancelled = False
+        self.seconds = 0.0
+        self.peak_rss = _rss_bytes()
+        self.profile = None  # text report when profiled
+
+    def sample_memory(self):
+        self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def summary(self):
+        return {"operation": self.name, "seconds": self.seconds, "phases": dict(self.phases), "cache_hit": self.cache_hit,
+                "error": self.error, "cancelled": self.cancelled, "peak_rss_bytes": self.peak_rss, **self.counts}
+
+
+@contextmanager
+def phase(name):
+    """Time a block as one phase of the current operation; does nothing outside track()."""
+    op = _current.get()
+    if op is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        op.phases[name] = op.phases.get(name, 0.0) + time.perf_counter() - start
+        op.sample_memory()
+
+
+def record(**counts):
+    """Add to the current operation's counters (input_bytes, output_bytes, pages, pixels)."""
+    op = _current.get()
+    if op is None: return
+    for key, value in counts.items():
+        op.counts[key] = op.counts.get(key, 0) + value
+
+
+def _start_profiler():
+    if PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            pass
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None  # another profiler is already active on this thread
+    return profiler
+
+
+def _stop_profiler(profiler, name):
+    """Save the full profile under PROFILE_DIR and return a short text report."""
+    import cProfile
+    import pstats
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.dump_stats(path + ".prof")
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        return out.getvalue()
+    profiler.stop()
+    with open(path + ".html", "w") as fh:
+        fh.write(profiler.output_html())
+    return profiler.output_text()
+
+
+@contextmanager
+def track(name, profile=False, **counts):
+    """
+    Measure one tool operation: wall time, phase timings, counters, sampled peak RSS and
+    whether it was a cache hit (set op.cache_hit). An exception ending the block is counted
+    as an error, except OperationCancelled. With profile, the block also runs under a profiler
+    and op.profile holds the report. Yields the Operation; it is added to the process-wide
+    metrics when the block exits.
+    """
+    op = Operation(name)
+    op.counts.update(counts)
+    token = _current.set(op)
+    profiler = _start_profiler() if profile else None
+    start = time.perf_counter()
+    try:
+        yield op
+    except OperationCancelled:
+        op.cancelled = True
+        raise
+    except Exception as e:
+        op.error = type(e).__name__
+        raise
+    finally:
+        op.seconds = time.perf_counter() - start
+        if profiler: op.profile = _stop_profiler(profiler, name)
+        _current.reset(token)
+        op.sample_memory()
+        get_metrics().observe(op)
+
+
+class MetricsRegistry:
+    """
+    Per-operation totals plus the most recent runs, and gauges from registered collectors
+    (callables returning a dict of numbers, e.g. ResultCache.stats). Rendered as JSON by
+    snapshot() or as Prometheus text by prometheus().
+    """
+
+    def __init__(self, recent=50):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._recent = deque(maxlen=recent)
+        self._collectors = {}
+
+    def observe(self, op):
+        with self._lock:
+            t = self._totals.get(op.name)
+            if t is None:
+                t = self._totals[op.name] = {"count": 0, "errors": 0, "cancelled": 0, "cache_hits": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                             "peak_rss_bytes": 0, "phases": {}, **dict.fromkeys(COUNTS, 0)}
+            t["count"] += 1
+            t["errors"] += op.error is not None
+            t["cancelled"] += op.cancelled
+            t["cache_hits"] += op.cache_hit
+            t["seconds"] += op.seconds
+            t["max_seconds"] = max(t["max_seconds"], op.seconds)
+            t["peak_rss_bytes"] = max(t["peak_rss_bytes"], op.peak_rss)
+            for key, value in op.phases.items(): t["phases"][key] = t["phases"].get(key, 0.0) + value
+            for key in COUNTS: t[key] += op.counts.get(key, 0)
+            self._recent.append(op.summary())
+
+    def register(self, name, collect):
+        self._collectors[name] = collect
+
+    def _collect(self):
+        out = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                out[name] = {k: v for k, v in collect().items() if isinstance(v, (int, float))}
+            except Exception:
+                continue
+        return out
+
+    def snapshot(self):
+        with self._lock:
+            totals = {name: dict(t, phases=dict(t["phases"])) for name, t in self._totals.items()}
+            recent = list(self._recent)
+        return {"operations": totals, "recent": recent, "collectors": self._collect()}
+
+    def prometheus(self):
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP docmint_{name} {help_text}")
+            lines.append(f"# TYPE docmint_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"docmint_{name}{{{label_text}}} {value}" if label_text else f"docmint_{name} {value}")
+
+        ops = snap["operations"]
+        metric("operations_total", "counter", "Tool operations run.", [({"operation": n}, t["count"]) for n, t in ops.items()])
+        metric("operation_errors_total", "counter", "Tool operations that raised.", [({"operation": n}, t["errors"]) for n, t in ops.items()])
+        metric("operation_cancelled_total", "counter", "Tool operations cancelled by the user.",
+               [({"operation": n}, t["cancelled"]) for n, t in ops.items()])
+        metric("operation_cache_hits_total", "counter", "Tool operations served from the result cache.",
+               [({"operation": n}, t["cache_hits"]) for n, t in ops.items()])
+        metric("operation_seconds_total", "counter", "Wall time spent in tool operations.", [({"operation": n}, t["seconds"]) for n, t in ops.items()])
+        metric("operation_seconds_max", "gauge", "Slowest single run.", [({"operation": n}, t["max_seconds"]) for n, t in ops.items()])
+        metric("operation_phase_seconds_total", "counter", "Wall time by phase (parse, process, encode, serialize).",
+               [({"operation": n, "phase": p}, s) for n, t in ops.items() for p, s in t["phases"].items()])
+        for key in COUNTS:
+            metric(f"operation_{key}_total", "counter", f"Sum of {key.replace('_', ' ')} handled.", [({"operation": n}, t[key]) for n, t in ops.items()])
+        metric("operation_peak_rss_bytes", "gauge", "Highest resident set size sampled during a run.",
+               [({"operation": n}, t["peak_rss_bytes"]) for n, t in ops.items()])
+        for name, values in snap["collectors"].items():
+            for key, value in values.items():
+                metric(f"{name}_{key}", "gauge", f"{name} {key.replace('_', ' ')}.", [({}, value)])
+        return "\n".join(lines) + "\n"
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    """Process-wide metrics registry."""
+    return _metrics
+
+
+def _metrics_handler():
+    # http.server is only imported when the endpoint is enabled
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, kind = get_metrics().prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, kind = json.dumps(get_metrics().snapshot(), default=str).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port, host=None):
+    """Serve /metrics (Prometheus text) and /metrics.json on host (default METRICS_HOST) from a daemon thread, once per process."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            from http.server import ThreadingHTTPServer
+            _server = ThreadingHTTPServer((host or METRICS_HOST, port), _metrics_handler())
+            threading.Thread(target=_server.serve_forever, name="docmint-metrics", daemon=True).start()
+    return _server
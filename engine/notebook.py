@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import contextvars
+import os
+import subprocess
+import threading
+import time
+
+from .common import read_bytes
+from .metrics import phase
+
+RENDER_WORKERS = int(os.environ.get("DOCMINT_RENDER_WORKERS", "2"))
+# Jobs allowed to wait for a free worker; beyond this new conversions are rejected
+RENDER_QUEUE_MAX = int(os.environ.get("DOCMINT_RENDER_QUEUE", "8"))
+RENDER_TIMEOUT = int(os.environ.get("DOCMINT_RENDER_TIMEOUT", "120"))
+
+PDF_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': "UTF-8",
+    'no-outline': None,
+    'quiet': ''
+}
+
+WKHTMLTOPDF_MISSING = "System dependency 'wkhtmltopdf' not found. If local, install it and add to PATH. If cloud, check packages.txt."
+
+
+def find_wkhtmltopdf():
+    # Common path for Linux/Streamlit Cloud
+    if os.path.exists('/usr/bin/wkhtmltopdf'):
+        return '/usr/bin/wkhtmltopdf'
+    # Common path for Local Windows (example)
+    if os.path.exists(r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'):
+        return r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
+    return None
+
+
+class NotebookRenderer:
+    """
+    Bounded notebook -> PDF service.
+
+    A fixed pool of worker threads each builds its HTMLExporter (and classic template) once
+    and reuses it; the wkhtmltopdf configuration is resolved once per process. nbconvert,
+    nbformat and pdfkit are only imported by the first conversion. At most
+    `workers` wkhtmltopdf processes run at a time, at most `queue_max` jobs wait, and each
+    render is killed after `timeout` seconds. stats() reports queue depth and render times.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_max=RENDER_QUEUE_MAX, timeout=RENDER_TIMEOUT):
+        self.workers = workers
+        self.queue_max = queue_max
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="docmint-render")
+        self._slots = threading.BoundedSemaphore(workers + queue_max)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._config = None
+        self.metrics = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "timeouts": 0,
+                        "rejected": 0, "render_seconds": 0.0, "max_render_seconds": 0.0}
+
+    def _configuration(self):
+        # Only a successful lookup is kept, so installing wkhtmltopdf later is picked up
+        if self._config is None:
+            import pdfkit
+            path = find_wkhtmltopdf()
+            self._config = pdfkit.configuration(wkhtmltopdf=path) if path else pdfkit.configuration()
+        return self._config
+
+    def _exporter(self):
+        if not hasattr(self._local, "exporter"):
+            from nbconvert import HTMLExporter
+            self._local.exporter = HTMLExporter(template_name='classic')
+        return self._local.exporter
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self.metrics[key] += delta
+
+    def _render(self, notebook_bytes):
+        self._count("queued", -1)
+        self._count("running")
+        start = time.perf_counter()
+        try:
+            import nbformat
+            import pdfkit
+
+            # 1. Read Notebook
+            with phase("parse"):
+                notebook = nbformat.reads(notebook_bytes.decode('utf-8'), as_version=4)
+
+            # 2. Convert to HTML using the worker's exporter
+            with phase("process"):
+                (body, resources) = self._exporter().from_notebook_node(notebook)
+
+            # 3. Convert HTML to PDF with wkhtmltopdf, killed if it overruns the job timeout
+            kit = pdfkit.PDFKit(body, 'string', options=PDF_OPTIONS, configuration=self._configuration())
+            with phase("encode"):
+                result = subprocess.run(kit.command(), input=body.encode('utf-8'), capture_output=True, timeout=self.timeout)
+            kit.handle_error(result.returncode, (result.stderr or b"").decode('utf-8', errors='replace'))
+            self._count("completed")
+            return result.stdout, "Success"
+        except subprocess.TimeoutExpired:
+            self._count("timeouts")
+            return None, f"Rendering took longer than {self.timeout}s and was stopped."
+        except OSError as e:
+            self._count("failed")
+            if "wkhtmltopdf" in str(e).lower(): return None, WKHTMLTOPDF_MISSING
+            return None, str(e)
+        except Exception as e:
+            self._count("failed")
+            return None, str(e)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.metrics["running"] -= 1
+                self.metrics["render_seconds"] += elapsed
+                self.metrics["max_render_seconds"] = max(self.metrics["max_render_seconds"], elapsed)
+            self._slots.release()
+
+    def submit(self, notebook_file):
+        """Queue a conversion; returns a Future of (pdf_bytes, status), or None if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            return None
+        self._count("queued")
+        # Run in the caller's context so phase timings land in its tracked operation
+        return self._pool.submit(contextvars.copy_context().run, self._render, read_bytes(notebook_file))
+
+    def convert(self, notebook_file):
+        future = self.submit(notebook_file)
+        if future is None:
+            return None, "Too many notebook conversions in progress. Please try again in a moment."
+        try:
+            # Covers time spent waiting behind a full queue as well as the render itself
+            return future.result(timeout=self.timeout * (self.queue_max // max(self.workers, 1) + 2))
+        except FutureTimeout:
+            return None, "The notebook renderer is busy. Please try again in a moment."
+
+    def stats(self):
+        with self._lock:
+            done = self.metrics["completed"] + self.metrics["failed"] + self.metrics["timeouts"]
+            return dict(self.metrics, queue_depth=self.metrics["queued"], workers=self.workers,
+                        avg_render_seconds=self.metrics["render_seconds"] / done if done else 0.0)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer():
+    """Process-wide renderer shared by every session."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None: _renderer = NotebookRenderer()
+    return _renderer
+
+
+def convert_notebook_to_pdf_bytes(notebook_file):
+    """
+    Converts an .ipynb file (bytes or stream) to PDF bytes using nbconvert -> HTML -> PDFKit (wkhtmltopdf),
+    through the shared renderer pool.
+    """
+    return get_renderer().convert(notebook_file)
@@ -0,0 +1,188 @@
+import os
+import zlib
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject, StreamObject
+
+from .common import spooled
+from .metrics import phase, record
+from .pdf_split import parse_page_spec
+from .pdf_stream import PdfStreamWriter, page_rotation
+
+PAGE_OPERATIONS = ("select", "delete", "rotate", "nup")
+# Pages per sheet -> (columns, rows)
+NUP_LAYOUTS = {2: (2, 1), 4: (2, 2), 6: (3, 2), 9: (3, 3)}
+
+
+def _num(v):
+    return f"{v:.3f}".rstrip("0").rstrip(".") or "0"
+
+
+def _positions(spec, count):
+    """Zero-based positions for a 1-based page spec: a string ("3,1-2", "all") or a list of numbers."""
+    if isinstance(spec, str):
+        return [p for group in parse_page_spec(spec, count) for p in group]
+    positions = [int(n) - 1 for n in spec]
+    for p in positions:
+        if not 0 <= p < count: raise ValueError(f"Page {p + 1} is outside 1-{count}")
+    return positions
+
+
+def plan_pages(count, operations):
+    """
+    Resolve an operation list against a document of count pages without reading it.
+
+    Page numbers in each operation refer to the pages as the operations before it left them.
+    Returns (sheets, per_sheet): one list of (source index, extra clockwise rotation) per
+    output page, each holding a single page unless the list ends with an N-up operation.
+    Raises ValueError for unknown operations and bad page numbers.
+    """
+    plan = [(i, 0) for i in range(count)]
+    per_sheet = 1
+    for op in operations:
+        kind = op.get("op")
+        if per_sheet > 1: raise ValueError("N-up must be the last operation")
+        if kind == "select":
+            positions = _positions(op["pages"], len(plan))
+            if len(set(positions)) != len(positions): raise ValueError("A page can only be used once")
+            plan = [plan[p] for p in positions]
+        elif kind == "delete":
+            drop = set(_positions(op["pages"], len(plan)))
+            plan = [entry for p, entry in enumerate(plan) if p not in drop]
+        elif kind == "rotate":
+            angle = int(op.get("angle", 90))
+            if angle % 90: raise ValueError("Rotation must be a multiple of 90 degrees")
+            targets = set(_positions(op.get("pages", "all"), len(plan)))
+            plan = [(i, (r + angle) % 360 if p in targets else r) for p, (i, r) in enumerate(plan)]
+        elif kind == "nup":
+            per_sheet = int(op.get("n", 2))
+            if per_sheet not in NUP_LAYOUTS: raise ValueError(f"Pages per sheet must be one of {', '.join(map(str, NUP_LAYOUTS))}")
+        else:
+            raise ValueError(f"Unknown page operation: {kind!r}")
+    if not plan: raise ValueError("No pages left to write")
+    return [plan[i:i + per_sheet] for i in range(0, len(plan), per_sheet)], per_sheet
+
+
+def _box(page):
+    """(x, y, width, height) of the page's media box."""
+    x0, y0, x1, y1 = (float(v) for v in page.mediabox)
+    return min(x0, x1), min(y0, y1), abs(x1 - x0), abs(y1 - y0)
+
+
+def _multiply(m, n):
+    """The cm matrix applying m, then n."""
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n
+    return (a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D, e * A + f * C + E, e * B + f * D + F)
+
+
+def _rotation(angle, w, h):
+    """cm matrix turning a w x h box (origin at 0, 0) clockwise by angle, keeping it in the positive quadrant."""
+    if angle == 90: return (0, -1, 1, 0, 0, w)
+    if angle == 180: return (-1, 0, 0, -1, w, h)
+    if angle == 270: return (0, 1, -1, 0, h, 0)
+    return (1, 0, 0, 1, 0, 0)
+
+
+def _content_bytes(page):
+    if "/Contents" not in page: return b""
+    contents = page["/Contents"].get_object()
+    if isinstance(contents, ArrayObject):
+        return b"\n".join(part.get_object().get_data() for part in contents)
+    return contents.get_data()
+
+
+def _page_form(writer, reader, page):
+    """The page drawn as a form XObject; its resources are copied once per reader and shared."""
+    x, y, w, h = _box(page)
+    form = StreamObject()
+    form._data = zlib.compress(_content_bytes(page), 6)
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject(FloatObject(_num(v)) for v in (x, y, x + w, y + h)),
+        NameObject("/Filter"): NameObject("/FlateDecode"),
+    })
+    if "/Resources" in page: form[NameObject("/Resources")] = writer.copy_object(reader, page.raw_get("/Resources"))
+    return writer.add_object(form)
+
+
+def _sheet_size(reader, sheet, cols, rows):
+    """The first page's displayed size, turned to suit the grid (landscape for 2-up and 6-up of portrait pages)."""
+    index, extra = sheet[0]
+    page = reader.pages[index]
+    _, _, w, h = _box(page)
+    if (page_rotation(page) + extra) % 180: w, h = h, w
+    if cols != rows and (cols > rows) != (w > h): w, h = h, w
+    return w, h
+
+
+def _write_sheet(writer, reader, sheet, per_sheet):
+    """One output page showing the sheet's pages scaled into a grid, left to right, top to bottom."""
+    cols, rows = NUP_LAYOUTS[per_sheet]
+    width, height = _sheet_size(reader, sheet, cols, rows)
+    cell_w, cell_h = width / cols, height / rows
+    xobjects, ops = DictionaryObject(), []
+    for k, (index, extra) in enumerate(sheet):
+        page = reader.pages[index]
+        x, y, w, h = _box(page)
+        angle = (page_rotation(page) + extra) % 360
+        shown_w, shown_h = (h, w) if angle % 180 else (w, h)
+        scale = min(cell_w / shown_w, cell_h / shown_h)
+        col, row = k % cols, k // cols
+        tx = col * cell_w + (cell_w - shown_w * scale) / 2
+        ty = height - (row + 1) * cell_h + (cell_h - shown_h * scale) / 2
+        matrix = _multiply(_multiply((1, 0, 0, 1, -x, -y), _rotation(angle, w, h)), (scale, 0, 0, scale, tx, ty))
+        name = f"/P{k}"
+        xobjects[NameObject(name)] = _page_form(writer, reader, page)
+        ops.append(f"q {' '.join(_num(v) for v in matrix)} cm {name} Do Q")
+    content = StreamObject()
+    content._data = zlib.compress("\n".join(ops).encode(), 6)
+    content[NameObject("/Filter")] = NameObject("/FlateDecode")
+    writer.add_page(DictionaryObject({
+        NameObject("/Type"): NameObject("/Page"),
+        NameObject("/MediaBox"): ArrayObject([NumberObject(0), NumberObject(0), FloatObject(_num(width)), FloatObject(_num(height))]),
+        NameObject("/Resources"): DictionaryObject({NameObject("/XObject"): xobjects}),
+        NameObject("/Contents"): writer.add_object(content),
+    }))
+
+
+def apply_page_ops(src, operations, dest, on_progress=None):
+    """
+    Apply a page operation list to src (path or stream) and write one PDF to dest (path or binary file).
+
+    Operations, applied in order:
+      {"op": "select", "pages": "3,1-2"}    keep these pages, in this order (reorder / extract)
+      {"op": "delete", "pages": [4, 5]}
+      {"op": "rotate", "pages": "all", "angle": 90}   clockwise, via /Rotate
+      {"op": "nup", "n": 4}                 2, 4, 6 or 9 pages per sheet; must come last
+    The list is resolved into a page plan first, then the document is parsed once and each
+    page written once; resources shared between pages are written once and referenced.
+    on_progress(done, total) is called after each output page. Returns the page count.
+    """
+    out = open(dest, "wb") if isinstance(dest, (str, os.PathLike)) else dest
+    try:
+        if isinstance(src, PdfReader): return _apply(src, operations, out, on_progress)
+        with spooled(src) as stream:
+            with phase("parse"):
+                reader = PdfReader(stream)
+            return _apply(reader, operations, out, on_progress)
+    finally:
+        if out is not dest: out.close()
+
+
+def _apply(reader, operations, out, on_progress):
+    with phase("process"):
+        sheets, per_sheet = plan_pages(len(reader.pages), operations)
+    writer = PdfStreamWriter(out)
+    with phase("serialize"):
+        if per_sheet == 1:
+            writer.add_reader(reader, [sheet[0][0] for sheet in sheets], release=False,
+                              rotations={i: r for (i, r), in sheets if r}, on_progress=on_progress)
+        else:
+            for n, sheet in enumerate(sheets):
+                _write_sheet(writer, reader, sheet, per_sheet)
+                if on_progress: on_progress(n + 1, len(sheets))
+        writer.close()
+    record(pages=sum(len(sheet) for sheet in sheets))
+    return len(sheets)
@@ -0,0 +1,33 @@
+from io import BytesIO
+from PyPDF2 import PdfReader, PdfWriter
+
+from .common import as_stream
+from .metrics import phase, record
+
+
+def open_pdf(src):
+    if isinstance(src, PdfReader): return src
+    return PdfReader(as_stream(src))
+
+
+def merge_pdfs(sources):
+    merger = PdfWriter()
+    with phase("parse"):
+        for src in sources: merger.append(as_stream(src))
+    record(pages=len(merger.pages))
+    out = BytesIO()
+    with phase("serialize"):
+        merger.write(out)
+    return out
+
+
+def extract_page(src, index):
+    """Return a single-page PDF for the zero-based page index."""
+    w = PdfWriter()
+    with phase("parse"):
+        w.add_page(open_pdf(src).pages[index])
+    record(pages=1)
+    o = BytesIO()
+    with phase("serialize"):
+        w.write(o)
+    return o
@@ -0,0 +1,292 @@
+import hashlib
+from io import BytesIO
+import zlib
+
+from PIL import Image
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject, StreamObject,
+)
+
+from .metrics import phase, record
+from .pdf import open_pdf
+
+# Per-strength settings: images above `dpi` are downsampled to it and re-encoded as JPEG at `quality`;
+# without `lossy`, lossless (Flate) images such as screenshots and line art stay lossless
+COMPRESSION_PROFILES = {
+    "Low": {"dpi": 300, "quality": 85, "lossy": False, "content": False, "strip": False},
+    "Medium": {"dpi": 150, "quality": 75, "lossy": True, "content": True, "strip": False},
+    "High": {"dpi": 100, "quality": 60, "lossy": True, "content": True, "strip": True},
+}
+
+# Objects that must stay unique even if byte-identical (page tree, annotations, form fields)
+_UNIQUE_TYPES = {"/Page", "/Pages", "/Catalog", "/Annot"}
+_FONT_SUBTYPES = {"/Type1C", "/CIDFontType0C", "/OpenType"}
+_IMAGE_MODES = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}
+
+
+def compress_pdf(src, level="Medium", on_progress=None):
+    """
+    Shrink a PDF: downsample/re-encode embedded images, deduplicate identical objects,
+    deflate unfiltered streams and drop objects that are no longer referenced.
+
+    on_progress(done, total) is called after each embedded image is processed.
+
+    Returns (buffer, report). The report has per-object-type byte totals "before" (of the
+    input) and "after", plus the number of "images" re-encoded and objects "deduplicated".
+    When the result would not be smaller, the input itself is returned and "unchanged" is True.
+    """
+    profile = COMPRESSION_PROFILES[level]
+    with phase("parse"):
+        reader = open_pdf(src)
+        writer = PdfWriter()
+        for page in reader.pages:
+            writer.add_page(page)
+    record(pages=len(writer.pages))
+
+    with phase("process"):
+        before = _size_by_type(writer)
+        if profile["strip"]:
+            writer.add_metadata({})
+            for page in writer.pages:
+                for key in ("/Thumb", "/PieceInfo"): page.pop(key, None)
+        if profile["content"]:
+            for page in writer.pages:
+                page.compress_content_streams()
+                # The re-encoded stream is set directly on the page; streams must be indirect
+                if not isinstance(page.raw_get("/Contents"), IndirectObject):
+                    page[NameObject("/Contents")] = writer._add_object(page.raw_get("/Contents"))
+        deduplicated = _deduplicate(writer)
+        _compact(writer)
+    with phase("encode"):
+        images = _recompress_images(writer, profile["dpi"], profile["quality"], profile["lossy"], on_progress)
+        if profile["content"]: _deflate_streams(writer)
+    after = _size_by_type(writer)
+
+    out = BytesIO()
+    with phase("serialize"):
+        writer.write(out)
+    reader.stream.seek(0, 2)
+    if out.tell() >= reader.stream.tell():
+        # Already compact (e.g. text-only): re-encoding would only add overhead
+        reader.stream.seek(0)
+        out = BytesIO(reader.stream.read())
+        out.seek(0, 2)
+        return out, {"before": before, "after": before, "images": 0, "deduplicated": 0, "unchanged": True}
+    return out, {"before": before, "after": after, "images": images, "deduplicated": deduplicated, "unchanged": False}
+
+
+# --- object graph helpers ---
+def _children(obj):
+    if isinstance(obj, DictionaryObject): return obj.values()
+    if isinstance(obj, ArrayObject): return obj
+    return ()
+
+
+def _remap(obj, mapping, writer):
+    """Point every reference in obj (recursing into direct containers) at mapping[idnum]."""
+    items = obj.items() if isinstance(obj, DictionaryObject) else enumerate(obj) if isinstance(obj, ArrayObject) else ()
+    for key, value in list(items):
+        if isinstance(value, IndirectObject):
+            if value.pdf is writer and value.idnum in mapping:
+                obj[key] = IndirectObject(mapping[value.idnum], 0, writer)
+        else:
+            _remap(value, mapping, writer)
+
+
+def _reachable(writer):
+    seen, stack = set(), [writer._root, writer._info]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, IndirectObject):
+            if obj.idnum in seen: continue
+            seen.add(obj.idnum)
+            obj = writer._objects[obj.idnum - 1]
+        stack.extend(_children(obj))
+    return seen
+
+
+def _object_type(obj, contents):
+    if isinstance(obj, StreamObject):
+        if obj.get("/Subtype") == "/Image": return "Images"
+        if "/Length1" in obj or obj.get("/Subtype") in _FONT_SUBTYPES: return "Fonts"
+        if id(obj) in contents: return "Content"
+        return "Other streams"
+    if isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Font", "/FontDescriptor"): return "Fonts"
+    return "Other"
+
+
+def _size_by_type(writer):
+    contents = set()
+    for page in writer.pages:
+        ref = page.get("/Contents")
+        if ref is None: continue  # blank page
+        refs = ref.get_object()
+        for r in (refs if isinstance(refs, ArrayObject) else [ref]):
+            contents.add(id(r.get_object()))
+    sizes = {}
+    for obj in writer._objects:
+        if obj is None: continue
+        buf = BytesIO()
+        DictionaryObject.write_to_stream(obj, buf, None) if isinstance(obj, StreamObject) else obj.write_to_stream(buf, None)
+        size = buf.tell() + (len(obj._data) if isinstance(obj, StreamObject) else 0)
+        kind = _object_type(obj, contents)
+        sizes[kind] = sizes.get(kind, 0) + size
+    return sizes
+
+
+# --- deduplication ---
+def _deduplicate(writer):
+    """Merge byte-identical objects; repeats until parents of merged objects stop collapsing."""
+    data_digest, dropped = {}, set()
+    while True:
+        canonical, mapping = {}, {}
+        for i, obj in enumerate(writer._objects):
+            if i in dropped or not isinstance(obj, (DictionaryObject, ArrayObject)): continue
+            if isinstance(obj, DictionaryObject) and (obj.get("/Type") in _UNIQUE_TYPES or "/Parent" in obj or "/P" in obj): continue
+            if i + 1 in (writer._root.idnum, writer._info.idnum, writer._pages.idnum): continue
+            buf = BytesIO()
+            if isinstance(obj, StreamObject):
+                if i not in data_digest: data_digest[i] = hashlib.sha1(obj._data).digest()
+                buf.write(data_digest[i])
+                DictionaryObject.write_to_stream(obj, buf, None)
+            else:
+                obj.write_to_stream(buf, None)
+            key = (type(obj).__name__, hashlib.sha1(buf.getvalue()).digest())
+            if key in canonical: mapping[i + 1] = canonical[key]
+            else: canonical[key] = i + 1
+        if not mapping: return len(dropped)
+        for obj in writer._objects:
+            _remap(obj, mapping, writer)
+        dropped.update(idnum - 1 for idnum in mapping)  # now unreferenced; removed by _compact
+
+
+def _compact(writer):
+    """Drop unreferenced objects and renumber the rest so the xref stays dense."""
+    keep = sorted(_reachable(writer))
+    if len(keep) == len(writer._objects): return
+    mapping = {old: new for new, old in enumerate(keep, 1)}
+    objects = [writer._objects[old - 1] for old in keep]
+    for obj in objects:
+        _remap(obj, mapping, writer)
+        ref = getattr(obj, "indirect_reference", None)
+        if ref is not None and ref.pdf is writer:
+            obj.indirect_reference = IndirectObject(mapping[obj.indirect_reference.idnum], 0, writer)
+    writer._objects = objects
+    writer._root = IndirectObject(mapping[writer._root.idnum], 0, writer)
+    writer._info = IndirectObject(mapping[writer._info.idnum], 0, writer)
+    writer._pages = IndirectObject(mapping[writer._pages.idnum], 0, writer)
+    writer._idnum_hash = {}
+    writer._id_translated = {}
+
+
+# --- stream re-encoding ---
+def _deflate_streams(writer):
+    for obj in writer._objects:
+        if isinstance(obj, StreamObject) and "/Filter" not in obj and len(obj._data) > 64:
+            data = zlib.compress(obj._data)
+            if len(data) < len(obj._data):
+                obj._data = data
+                obj[NameObject("/Filter")] = NameObject("/FlateDecode")
+
+
+def _inherited(page, key):
+    """A page attribute, looked up through the page tree (/Resources and /MediaBox can sit on a /Pages node)."""
+    node, seen = page, set()
+    while isinstance(node, DictionaryObject) and id(node) not in seen:
+        if key in node: return node[key]
+        seen.add(id(node))
+        parent = node.get("/Parent")
+        node = parent.get_object() if parent is not None else None
+    return None
+
+
+def _image_extents(writer):
+    """Map image idnum -> largest page size (inches) it is drawn on, following form XObjects."""
+    extents = {}
+    for page in writer.pages:
+        box = _inherited(page, "/MediaBox")
+        x0, y0, x1, y1 = (float(v) for v in box.get_object()) if box is not None else (0, 0, 612, 792)
+        size = (abs(x1 - x0) / 72, abs(y1 - y0) / 72)
+        stack, seen = [_inherited(page, "/Resources")], set()
+        while stack:
+            res = stack.pop()
+            res = res.get_object() if res is not None else None
+            xobjects = res.get("/XObject") if isinstance(res, DictionaryObject) else None
+            xobjects = xobjects.get_object() if xobjects is not None else {}
+            for ref in xobjects.values():
+                if not isinstance(ref, IndirectObject) or ref.idnum in seen: continue
+                seen.add(ref.idnum)
+                xobj = ref.get_object()
+                if xobj.get("/Subtype") == "/Image":
+                    w, h = extents.get(ref.idnum, (0, 0))
+                    extents[ref.idnum] = (max(w, size[0]), max(h, size[1]))
+                elif xobj.get("/Subtype") == "/Form":
+                    stack.append(xobj.get("/Resources"))
+    return extents
+
+
+def _decode_image(xobj):
+    # Masked images are left alone: a soft mask has to stay the size of its image
+    if xobj.get("/ImageMask") or "/Mask" in xobj or "/SMask" in xobj or "/Decode" in xobj: return None
+    if xobj.get("/BitsPerComponent", 8) != 8: return None
+    cs = xobj.get("/ColorSpace")
+    cs = cs.get_object() if cs is not None else None
+    if isinstance(cs, ArrayObject) and cs[0] == "/ICCBased":
+        cs = {1: "/DeviceGray", 3: "/DeviceRGB"}.get(cs[1].get_object().get("/N"))
+    mode = _IMAGE_MODES.get(cs)
+    if mode is None: return None
+    filters = xobj.get("/Filter")
+    filters = [filters] if isinstance(filters, str) else list(filters or [])
+    size = (int(xobj["/Width"]), int(xobj["/Height"]))
+    if filters == ["/DCTDecode"]:
+        img = Image.open(BytesIO(xobj._data))
+        return img if img.mode == mode else None
+    if filters in ([], ["/FlateDecode"]):
+        return Image.frombytes(mode, size, xobj.get_data())
+    return None
+
+
+def _recompress_images(writer, dpi, quality, lossy=True, on_progress=None):
+    """
+    Downsample images drawn above dpi and re-encode them as JPEG at quality. Without lossy,
+    only images drawn above dpi are touched, and those that were not JPEG stay Flate-compressed. The image's
+    /ColorSpace (e.g. an ICC profile) is kept. Returns the number of images replaced.
+    """
+    count = 0
+    extents = _image_extents(writer)
+    for i, (idnum, (page_w, page_h)) in enumerate(extents.items()):
+        if on_progress and i: on_progress(i, len(extents))
+        xobj = writer._objects[idnum - 1]
+        try:
+            img = _decode_image(xobj)
+        except Exception:
+            continue
+        if img is None: continue
+
+        # The image is at most page-sized, so this under-estimates its DPI and never over-shrinks
+        scale = min(1.0, dpi / min(img.width / page_w, img.height / page_h)) if page_w and page_h else 1.0
+        new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        # Without lossy, an image is only touched to downsample it (JPEGs are re-encoded then)
+        if not lossy and img.size == new_size: continue
+        jpeg = lossy or img.format == "JPEG"
+        if img.format == "JPEG": img.draft(img.mode, new_size)
+        if img.size != new_size: img = img.resize(new_size, Image.Resampling.LANCZOS)
+        if jpeg:
+            buf = BytesIO()
+            img.save(buf, format="JPEG", quality=quality, optimize=True)
+            data = buf.getvalue()
+        else:
+            data = zlib.compress(img.tobytes(), 9)
+        if len(data) >= len(xobj._data) * 0.9: continue
+
+        xobj._data = data
+        xobj.decoded_self = None
+        xobj[NameObject("/Filter")] = NameObject("/DCTDecode" if jpeg else "/FlateDecode")
+        xobj[NameObject("/Width")] = NumberObject(img.width)
+        xobj[NameObject("/Height")] = NumberObject(img.height)
+        xobj[NameObject("/BitsPerComponent")] = NumberObject(8)
+        xobj.pop("/DecodeParms", None)
+        count += 1
+    if on_progress and extents: on_progress(len(extents), len(extents))
+    return count
@@ -0,0 +1,131 @@
+from collections import deque
+from io import BytesIO
+import os
+import re
+import tempfile
+
+from PyPDF2 import PdfReader
+
+from .archive import write_zip
+from .common import process_pool, spooled
+from .metrics import phase, record
+from .pdf_stream import PdfStreamWriter
+
+# Below this many output files the pool start-up costs more than it saves
+PARALLEL_MIN_FILES = 16
+# Most groups sent to a worker in one task; bounds the work left running after a cancel
+SPLIT_CHUNK = 8
+
+_worker_reader = None
+
+
+def parse_page_spec(spec, total):
+    """
+    Turn a split spec into page groups (lists of zero-based indices), one per output file.
+
+    "all" -> one file per page; "every 10" / "every 10 pages" -> chunks of 10;
+    "1-5,8,12-20" -> one file per comma-separated range (1-based, inclusive).
+    Raises ValueError for malformed or out-of-range specs.
+    """
+    spec = spec.strip().lower()
+    if spec in ("", "all"):
+        return [[i] for i in range(total)]
+    m = re.fullmatch(r"every\s+(\d+)(\s+pages?)?", spec)
+    if m:
+        n = int(m.group(1))
+        if n < 1: raise ValueError("Chunk size must be at least 1")
+        return [list(range(i, min(i + n, total))) for i in range(0, total, n)]
+    groups = []
+    for part in spec.split(","):
+        m = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?", part)
+        if not m: raise ValueError(f"Invalid page range: '{part.strip()}'")
+        start, end = int(m.group(1)), int(m.group(2) or m.group(1))
+        if not 1 <= start <= end <= total: raise ValueError(f"Page range {part.strip()} is outside 1-{total}")
+        groups.append(list(range(start - 1, end)))
+    return groups
+
+
+def group_name(group):
+    if len(group) == 1: return f"page_{group[0]+1}.pdf"
+    return f"pages_{group[0]+1}-{group[-1]+1}.pdf"
+
+
+def _write_group(reader, group):
+    out = BytesIO()
+    writer = PdfStreamWriter(out)
+    writer.add_reader(reader, group, release=False)
+    writer.close()
+    return group_name(group), out.getvalue()
+
+
+def _init_worker(path):
+    global _worker_reader
+    _worker_reader = PdfReader(path)
+
+
+def _worker_write_groups(groups):
+    return [_write_group(_worker_reader, group) for group in groups]
+
+
+def iter_split(src, groups, workers=None):
+    """
+    Yield (file name, pdf bytes) for each page group, in order.
+
+    Large jobs are spread over a process pool; each worker parses the document once and
+    writes whole groups, so resources shared by a group's pages are stored once per file.
+    Groups are sent in small chunks, at most two per worker queued at a time: closing the
+    generator (e.g. a cancelled job) drops the rest and only waits for the chunks in progress.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(groups) < PARALLEL_MIN_FILES:
+        if isinstance(src, PdfReader):
+            for group in groups:
+                yield _write_group(src, group)
+            return
+        with spooled(src) as stream:
+            reader = PdfReader(stream)
+            for group in groups:
+                yield _write_group(reader, group)
+        return
+
+    # Workers re-open the document from disk instead of receiving it with every task
+    path, tmp = src, None
+    if not isinstance(src, (str, os.PathLike)):
+        fd, tmp = tempfile.mkstemp(suffix=".pdf")
+        with spooled(src.stream if isinstance(src, PdfReader) else src) as stream, os.fdopen(fd, "wb") as fh:
+            while True:
+                chunk = stream.read(1 << 20)
+                if not chunk: break
+                fh.write(chunk)
+        path = tmp
+    try:
+        workers = min(workers, len(groups))
+        pool = process_pool(workers, initializer=_init_worker, initargs=(path,))
+        chunk = max(1, min(SPLIT_CHUNK, len(groups) // (workers * 4)))
+        try:
+            pending = deque()
+            for i in range(0, len(groups), chunk):
+                pending.append(pool.submit(_worker_write_groups, groups[i:i + chunk]))
+                if len(pending) >= workers * 2: yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            pool.shutdown(cancel_futures=True)
+    finally:
+        if tmp: os.remove(tmp)
+
+
+def split_pdf_to_zip(src, dest, groups, workers=None, on_progress=None):
+    """
+    Split src into dest (path or binary file) as a ZIP, adding each file as soon as it is ready.
+    on_progress(done, total) is called after each file.
+    """
+    def members():
+        for i, member in enumerate(iter_split(src, groups, workers)):
+            yield member
+            if on_progress: on_progress(i + 1, len(groups))
+
+    record(pages=sum(len(group) for group in groups))
+    with phase("serialize"):
+        return write_zip(members(), dest)
+
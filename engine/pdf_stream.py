@@ -0,0 +1,192 @@
+import os
+import weakref
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject, StreamObject,
+)
+
+from .common import spooled
+from .metrics import phase, record
+
+_CATALOG, _PAGES = 1, 2
+
+
+class PdfStreamWriter:
+    """
+    Append-only PDF writer: every object is serialized to `fileobj` as soon as it is
+    reached, so memory stays proportional to one page's objects rather than the document.
+
+    Pages from the same reader share their resources (each source object is written once).
+    Call close() to write the page tree, xref and trailer. Only pages are carried over:
+    outlines, /AcroForm form fields and /Names (named destinations, attachments) are not.
+    """
+
+    def __init__(self, fileobj):
+        self.out = fileobj
+        self.offsets = {}
+        self.kids = []
+        self.next_num = _PAGES + 1
+        self._maps = weakref.WeakKeyDictionary()  # reader -> ({source idnum: output idnum}, page ids, tree ids)
+        self.out.write(b"%PDF-1.7\n%\xE2\xE3\xCF\xD3\n")
+
+    def _reserve(self):
+        num = self.next_num
+        self.next_num += 1
+        return num
+
+    def _write_obj(self, num, obj):
+        self.offsets[num] = self.out.tell()
+        self.out.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self.out, None)
+        self.out.write(b"\nendobj\n")
+
+    def _rebind(self, obj, reader, pending):
+        """Copy obj with every reference renumbered into this file; queue unseen targets."""
+        if isinstance(obj, IndirectObject):
+            mapping, page_ids, tree_ids = self._maps[reader]
+            if obj.idnum not in mapping:
+                # Source page-tree nodes collapse into ours; pages not being written are dropped
+                if obj.idnum in tree_ids: return IndirectObject(_PAGES, 0, None)
+                if obj.idnum in page_ids: return NullObject()
+                mapping[obj.idnum] = self._reserve()
+                pending.append(obj)
+            return IndirectObject(mapping[obj.idnum], 0, None)
+        if isinstance(obj, StreamObject):
+            copy = StreamObject()
+            copy._data = obj._data
+        elif isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+        elif isinstance(obj, ArrayObject):
+            return ArrayObject(self._rebind(v, reader, pending) for v in obj)
+        else:
+            return obj
+        for key, value in obj.items():
+            # write_to_stream() sets a stream's own /Length; copying an indirect one would orphan it
+            if key == "/Length" and isinstance(obj, StreamObject): continue
+            copy[key] = self._rebind(value, reader, pending)
+        return copy
+
+    def _mapping(self, reader):
+        if reader not in self._maps: self._maps[reader] = ({},) + _page_tree_ids(reader)
+        return self._maps[reader][0]
+
+    def _flush(self, reader, pending):
+        mapping = self._mapping(reader)
+        while pending:
+            ref = pending.pop()
+            self._write_obj(mapping[ref.idnum], self._rebind(ref.get_object(), reader, pending))
+
+    def add_reader(self, reader, pages=None, release=True, rotations=None, on_progress=None):
+        """
+        Write pages (indices, default all) of reader. With release, the reader's parsed-object
+        cache is dropped after each page; pass False when the reader is reused for more output.
+        rotations maps a page index to extra clockwise degrees (a multiple of 90);
+        on_progress(done, total) is called after each page.
+        """
+        mapping = self._mapping(reader)
+        indices = range(len(reader.pages)) if pages is None else pages
+        # Reserve page numbers first so links/annotations pointing at other pages resolve
+        for i in indices:
+            ref = reader.pages[i].indirect_reference
+            if ref is not None and ref.idnum not in mapping: mapping[ref.idnum] = self._reserve()
+        for n, i in enumerate(indices):
+            page = reader.pages[i]
+            pending = []
+            copy = self._rebind(page, reader, pending)
+            if rotations and rotations.get(i):
+                copy[NameObject("/Rotate")] = NumberObject((page_rotation(page) + rotations[i]) % 360)
+            num = mapping[page.indirect_reference.idnum] if page.indirect_reference else self._reserve()
+            self._write_obj(num, copy)
+            self.kids.append(num)
+            self._flush(reader, pending)
+            if release: reader.resolved_objects.clear()
+            if on_progress: on_progress(n + 1, len(indices))
+
+    def copy_object(self, reader, obj):
+        """
+        Copy obj from reader into this file and return the copy, ready to embed in a new object.
+        Everything it references is written once per reader, so e.g. fonts and images shared
+        with pages already written are referenced rather than duplicated.
+        """
+        self._mapping(reader)
+        pending = []
+        copy = self._rebind(obj, reader, pending)
+        self._flush(reader, pending)
+        return copy
+
+    def add_object(self, obj):
+        """Write a new object whose references already point into this file; returns its reference."""
+        num = self._reserve()
+        self._write_obj(num, obj)
+        return IndirectObject(num, 0, None)
+
+    def add_page(self, page):
+        """Append a page dictionary built for this file (e.g. from add_object references)."""
+        page[NameObject("/Parent")] = IndirectObject(_PAGES, 0, None)
+        self.kids.append(self.add_object(page).idnum)
+
+    def close(self):
+        pages = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(k, 0, None) for k in self.kids),
+            NameObject("/Count"): NumberObject(len(self.kids)),
+        })
+        self._write_obj(_PAGES, pages)
+        self._write_obj(_CATALOG, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(_PAGES, 0, None),
+        }))
+        xref = self.out.tell()
+        self.out.write(f"xref\n0 {self.next_num}\n0000000000 65535 f \n".encode())
+        for num in range(1, self.next_num):
+            # Reserved numbers never written (e.g. skipped pages) become free entries
+            if num in self.offsets: self.out.write(f"{self.offsets[num]:010d} 00000 n \n".encode())
+            else: self.out.write(b"0000000000 65535 f \n")
+        self.out.write(f"trailer\n<< /Size {self.next_num} /Root {_CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def page_rotation(page):
+    """The page's /Rotate (inherited values are already copied onto pages by PdfReader)."""
+    return int(page["/Rotate"]) % 360 if "/Rotate" in page else 0
+
+
+_tree_ids = weakref.WeakKeyDictionary()
+
+
+def _page_tree_ids(reader):
+    """Object numbers of reader's pages and /Pages nodes, computed once per reader."""
+    if reader in _tree_ids: return _tree_ids[reader]
+    page_ids, tree_ids = set(), set()
+    for page in reader.pages:
+        if page.indirect_reference is not None: page_ids.add(page.indirect_reference.idnum)
+        parent = page.raw_get("/Parent") if "/Parent" in page else None
+        while isinstance(parent, IndirectObject) and parent.idnum not in tree_ids:
+            tree_ids.add(parent.idnum)
+            node = parent.get_object()
+            parent = node.raw_get("/Parent") if "/Parent" in node else None
+    _tree_ids[reader] = (page_ids, tree_ids)
+    return page_ids, tree_ids
+
+
+def merge_pdfs_to_file(sources, dest, on_progress=None):
+    """
+    Merge sources (paths or streams) into dest (path or binary file). Returns the page count.
+    on_progress(done, total) is called after each source file.
+    """
+    sources = list(sources)
+    out = open(dest, "wb") if isinstance(dest, (str, os.PathLike)) else dest
+    try:
+        writer = PdfStreamWriter(out)
+        for i, src in enumerate(sources):
+            with spooled(src) as stream:
+                with phase("parse"):
+                    reader = PdfReader(stream)
+                with phase("serialize"):
+                    writer.add_reader(reader)
+            if on_progress: on_progress(i + 1, len(sources))
+        writer.close()
+        record(pages=len(writer.kids))
+        return len(writer.kids)
+    finally:
+        if out is not dest: out.close()
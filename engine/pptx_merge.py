@@ -0,0 +1,338 @@
+import hashlib
+import posixpath
+import re
+from urllib.parse import unquote
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import quoteattr
+import zipfile
+
+from .archive import write_zip
+from .common import spool
+from .metrics import phase, record
+
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+_P_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+_R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_RT = _R_NS + "/"
+_RT_DOCUMENT, _RT_SLIDE, _RT_MASTER, _RT_NOTES_MASTER = (_RT + t for t in ("officeDocument", "slide", "slideMaster", "notesMaster"))
+# Comments point at the deck's author list, which is not merged; slide XML never names them by id
+_SKIPPED_RELS = {_RT + "comments", "http://schemas.microsoft.com/office/2018/10/relationships/comments"}
+# Slide ids start here; master and layout ids share one space starting above 2^31 - 1
+_FIRST_SLIDE_ID, _FIRST_MASTER_ID = 256, 2147483648
+_LAYOUT_ID = re.compile(r'(<\w+:sldLayoutId\b[^>]*?(?<![:\w])id=")(\d+)(")')
+_CHUNK = 1 << 20
+
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+
+def _rels_path(part):
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _resolve(source, target):
+    target = unquote(target)
+    if target.startswith("/"): return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def _relative(source, target):
+    return posixpath.relpath(target, posixpath.dirname(source) or ".")
+
+
+def _rels_xml(rels):
+    """Serialize [(id, type, target, external)] as a .rels part."""
+    lines = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_REL_NS}">']
+    for rel_id, rel_type, target, external in rels:
+        mode = ' TargetMode="External"' if external else ""
+        lines.append(f"<Relationship Id={quoteattr(rel_id)} Type={quoteattr(rel_type)} Target={quoteattr(target)}{mode}/>")
+    lines.append("</Relationships>")
+    return "".join(lines).encode()
+
+
+class _Package:
+    """A .pptx opened as a ZIP: content types and relationships, with parts read on demand."""
+
+    def __init__(self, src):
+        self.stream = spool(src)
+        self.owned = self.stream is not src
+        self.zip = zipfile.ZipFile(self.stream)
+        self.infos = {info.filename: info for info in self.zip.infolist()}
+        types = ET.fromstring(self.zip.read("[Content_Types].xml"))
+        self.defaults = {e.get("Extension").lower(): e.get("ContentType") for e in types.iter(f"{{{_CT_NS}}}Default")}
+        self.overrides = {e.get("PartName").lstrip("/"): e.get("ContentType") for e in types.iter(f"{{{_CT_NS}}}Override")}
+        self.main = next(target for _, kind, target, _ in self.rels("") if kind == _RT_DOCUMENT)
+
+    def content_type(self, part):
+        return self.overrides.get(part) or self.defaults.get(part.rsplit(".", 1)[-1].lower())
+
+    def rels(self, part):
+        """[(id, type, target part or URL, external)] of a part ("" for the package)."""
+        path = _rels_path(part) if part else "_rels/.rels"
+        if path not in self.infos: return []
+        out = []
+        for e in ET.fromstring(self.zip.read(path)).iter(f"{{{_REL_NS}}}Relationship"):
+            external = e.get("TargetMode") == "External"
+            out.append((e.get("Id"), e.get("Type"), e.get("Target") if external else _resolve(part, e.get("Target")), external))
+        return out
+
+    def slides(self):
+        """Slide part names in presentation order."""
+        targets = {rel_id: target for rel_id, _, target, _ in self.rels(self.main)}
+        root = ET.fromstring(self.zip.read(self.main))
+        return [targets[e.get(f"{{{_R_NS}}}id")] for e in root.iter(f"{{{_P_NS}}}sldId")]
+
+    def is_media(self, part):
+        """Binary leaf parts (images, video, audio, embeddings): stored once however often they occur."""
+        return not part.endswith((".xml", ".rels")) and _rels_path(part) not in self.infos
+
+    def close(self):
+        self.zip.close()
+        if self.owned: self.stream.close()
+
+
+class _Media:
+    """A media part written to the output, with the source it came from for later comparisons."""
+
+    def __init__(self, name, package, part):
+        self.name = name
+        self.package = package
+        self.part = part
+        self._digest = None
+
+    def digest(self):
+        if self._digest is None: self._digest = _digest(self.package, self.part)
+        return self._digest
+
+
+def _digest(package, part):
+    h = hashlib.sha256()
+    with package.zip.open(package.infos[part]) as fh:
+        for chunk in iter(lambda: fh.read(_CHUNK), b""): h.update(chunk)
+    return h.digest()
+
+
+def count_slides(src):
+    """Slide count from presentation.xml; no other part is read."""
+    package = _Package(src)
+    try:
+        return len(package.slides())
+    finally:
+        package.close()
+
+
+class PptxMerger:
+    """
+    Merges .pptx decks part by part at the ZIP level. add_deck() and finish() yield
+    members for write_zip; binary parts are yielded as streams (with their size) straight from
+    the source ZIP, so memory holds one XML part at a time, never a whole deck or video.
+
+    The first deck is the base: all its parts are kept and it supplies the slide size,
+    notes master and presentation properties. Slides of later decks are appended with
+    everything they reference (layouts, masters, themes, media, charts, notes) under new
+    part names. Media parts are matched by CRC and size from the ZIP directory and, on a
+    match, by SHA-256; identical ones are stored once and referenced.
+    """
+
+    def __init__(self):
+        self.packages = []
+        self.names = set()          # lowercased part names taken in the output
+        self.defaults, self.overrides = {}, {}
+        self.media = {}             # (crc, size) -> [_Media]
+        self.slides, self.masters = [], []  # output parts to add to presentation.xml
+        self.notes_master = None
+        self.new_notes_master = False
+        self.next_master_id = _FIRST_MASTER_ID
+        self.deduplicated = 0
+        self.saved_bytes = 0
+        self._counters = {}
+
+    # --- output naming ---
+    def _take(self, name):
+        self.names.add(name.lower())
+        return name
+
+    def _new_name(self, part):
+        stem, ext = re.fullmatch(r"(.*?)\d*(\.[^./]+)?", part).groups()
+        ext = ext or ""
+        n = self._counters.get((stem, ext), 1)
+        while f"{stem}{n}{ext}".lower() in self.names: n += 1
+        self._counters[(stem, ext)] = n + 1
+        return self._take(f"{stem}{n}{ext}")
+
+    def _set_type(self, name, content_type):
+        if content_type is None: return
+        ext = name.rsplit(".", 1)[-1].lower()
+        if self.defaults.get(ext) == content_type: return
+        if ext not in self.defaults and "/" not in ext: self.defaults[ext] = content_type
+        else: self.overrides[name] = content_type
+
+    def _add_media(self, package, part, name):
+        info = package.infos[part]
+        self.media.setdefault((info.CRC, info.file_size), []).append(_Media(name, package, part))
+
+    def _find_media(self, package, part):
+        info = package.infos[part]
+        candidates = self.media.get((info.CRC, info.file_size))
+        if not candidates: return None
+        digest = _digest(package, part)
+        for media in candidates:
+            if media.digest() == digest: return media.name
+        return None
+
+    def _stream(self, package, part, name):
+        with package.zip.open(package.infos[part]) as fh:
+            yield name, fh, package.infos[part].file_size
+
+    # --- decks ---
+    def add_deck(self, src):
+        """Yield the output members for one more deck."""
+        package = _Package(src)
+        self.packages.append(package)
+        if len(self.packages) == 1: yield from self._add_base(package)
+        else: yield from self._append(package)
+
+    def _add_base(self, package):
+        self.base = package
+        self.defaults, self.overrides = dict(package.defaults), dict(package.overrides)
+        self.base_rels = package.rels(package.main)
+        self.base_slides = len(package.slides())
+        held = {"[Content_Types].xml", package.main, _rels_path(package.main)}
+        for _, kind, target, _ in self.base_rels:
+            if kind == _RT_NOTES_MASTER: self.notes_master = target
+            if kind == _RT_MASTER:
+                ids = [int(m.group(2)) for m in _LAYOUT_ID.finditer(package.zip.read(target).decode("utf-8"))]
+                self.next_master_id = max([self.next_master_id - 1] + ids) + 1
+        ids = re.findall(r'<\w+:sldMasterId\b[^>]*?(?<![:\w])id="(\d+)"', package.zip.read(package.main).decode("utf-8"))
+        self.next_master_id = max([self.next_master_id - 1] + [int(i) for i in ids]) + 1
+        for part in package.infos:
+            self._take(part)
+            if part in held or part.endswith("/"): continue
+            if package.is_media(part): self._add_media(package, part, part)
+            yield from self._stream(package, part, part)
+
+    def _append(self, package):
+        slides = package.slides()
+        mapping = {slide: self._new_name(slide) for slide in slides}
+        stack = list(slides)
+        while stack:
+            part = stack.pop()
+            name = mapping[part]
+            rels = []
+            for rel_id, kind, target, external in package.rels(part):
+                if kind in _SKIPPED_RELS: continue
+                if not external:
+                    if target not in package.infos: continue
+                    if target not in mapping:
+                        if kind == _RT_NOTES_MASTER and self.notes_master:
+                            mapping[target] = self.notes_master
+                        elif package.is_media(target):
+                            mapping[target] = self._find_media(package, target)
+                            if mapping[target]:
+                                self.deduplicated += 1
+                                self.saved_bytes += package.infos[target].file_size
+                            else:
+                                mapping[target] = self._new_name(target)
+                                self._add_media(package, target, mapping[target])
+                                self._set_type(mapping[target], package.content_type(target))
+                                yield from self._stream(package, target, mapping[target])
+                        else:
+                            mapping[target] = self._new_name(target)
+                            stack.append(target)
+                            if kind == _RT_NOTES_MASTER:
+                                self.notes_master, self.new_notes_master = mapping[target], True
+                    target = _relative(name, mapping[target])
+                rels.append((rel_id, kind, target, external))
+            data = package.zip.read(part)
+            if (package.content_type(part) or "").endswith(".slideMaster+xml"):
+                data = self._renumber_master(name, data)
+            self._set_type(name, package.content_type(part))
+            if rels: yield _rels_path(name), _rels_xml(rels)
+            yield name, data
+        self.slides += [mapping[slide] for slide in slides]
+
+    def _renumber_master(self, name, data):
+        """Give the master and its layouts ids that are unique in the merged deck."""
+        self.masters.append((name, self.next_master_id))
+        self.next_master_id += 1
+
+        def renumber(m):
+            self.next_master_id += 1
+            return f"{m.group(1)}{self.next_master_id - 1}{m.group(3)}"
+        return _LAYOUT_ID.sub(renumber, data.decode("utf-8")).encode("utf-8")
+
+    # --- package-level parts ---
+    def finish(self):
+        """Yield presentation.xml, its relationships and [Content_Types].xml with the appended parts listed."""
+        main = self.base.main
+        rels = list(self.base_rels)
+        used = {rel_id for rel_id, _, _, _ in rels}
+
+        def relate(kind, target):
+            n = len(used) + 1
+            while f"rId{n}" in used: n += 1
+            used.add(f"rId{n}")
+            rels.append((f"rId{n}", kind, target, False))
+            return f"rId{n}"
+
+        xml = self.base.zip.read(main).decode("utf-8")
+        p = re.search(rf'xmlns:(\w+)="{re.escape(_P_NS)}"', xml).group(1)
+        r = re.search(rf'xmlns:(\w+)="{re.escape(_R_NS)}"', xml).group(1)
+        masters = [f'<{p}:sldMasterId id="{master_id}" {r}:id="{relate(_RT_MASTER, name)}"/>' for name, master_id in self.masters]
+        xml = _append_list(xml, p, "sldMasterIdLst", masters, ("notesMasterIdLst", "handoutMasterIdLst", "sldIdLst", "sldSz", "notesSz"))
+        if self.new_notes_master:
+            entry = f'<{p}:notesMasterId {r}:id="{relate(_RT_NOTES_MASTER, self.notes_master)}"/>'
+            xml = _append_list(xml, p, "notesMasterIdLst", [entry], ("handoutMasterIdLst", "sldIdLst", "sldSz", "notesSz"))
+        next_id = max([_FIRST_SLIDE_ID - 1] + [int(i) for i in re.findall(rf'<{p}:sldId\b[^>]*?(?<![:\w])id="(\d+)"', xml)]) + 1
+        slides = [f'<{p}:sldId id="{next_id + i}" {r}:id="{relate(_RT_SLIDE, name)}"/>' for i, name in enumerate(self.slides)]
+        xml = _append_list(xml, p, "sldIdLst", slides, ("sldSz", "notesSz"))
+
+        yield main, xml.encode("utf-8")
+        yield _rels_path(main), _rels_xml([(i, k, t if e else _relative(main, t), e) for i, k, t, e in rels])
+        types = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Types xmlns="{_CT_NS}">']
+        types += [f"<Default Extension={quoteattr(ext)} ContentType={quoteattr(ct)}/>" for ext, ct in self.defaults.items()]
+        types += [f"<Override PartName={quoteattr('/' + part)} ContentType={quoteattr(ct)}/>" for part, ct in self.overrides.items()]
+        yield "[Content_Types].xml", ("".join(types) + "</Types>").encode("utf-8")
+
+    def close(self):
+        for package in self.packages: package.close()
+        self.packages = []
+
+
+def _append_list(xml, p, tag, items, following):
+    """Append items to the <p:tag> list, creating it before the first `following` element present."""
+    if not items: return xml
+    body, close = "".join(items), f"</{p}:{tag}>"
+    if close in xml: return xml.replace(close, body + close, 1)
+    m = re.search(rf"<{p}:{tag}\s*/>", xml)
+    if m: return xml[:m.start()] + f"<{p}:{tag}>{body}{close}" + xml[m.end():]
+    for name in following:
+        m = re.search(rf"<{p}:{name}[\s/>]", xml)
+        if m: return xml[:m.start()] + f"<{p}:{tag}>{body}{close}" + xml[m.start():]
+    raise ValueError(f"presentation.xml has no place for {tag}")
+
+
+def merge_pptx_to_file(sources, dest, on_progress=None):
+    """
+    Merge .pptx decks (paths or streams), in order, into dest (path or binary file).
+    on_progress(done, total) is called after each deck. Returns a summary dict.
+    """
+    sources = list(sources)
+    if not sources: raise ValueError("No decks to merge")
+    merger = PptxMerger()
+
+    def members():
+        for i, src in enumerate(sources):
+            yield from merger.add_deck(src)
+            if on_progress: on_progress(i + 1, len(sources))
+        yield from merger.finish()
+
+    try:
+        with phase("serialize"):
+            write_zip(members(), dest)
+    finally:
+        merger.close()
+    slides = merger.base_slides + len(merger.slides)
+    record(pages=slides)
+    return {"slides": slides, "decks": len(sources), "deduplicated": merger.deduplicated, "saved_bytes": merger.saved_bytes}
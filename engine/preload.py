@@ -0,0 +1,74 @@
+import importlib
+import os
+import threading
+import time
+
+# Opt-in ("1"): load every tool's modules on a background thread once the app has served a page.
+# Off by default, since on small containers it brings back the memory and GIL time lazy imports save.
+PREWARM = os.environ.get("DOCMINT_PREWARM", "0") == "1"
+
+_IMAGE = ("engine.images",)
+# Modules each tool needs on top of the app shell: importing these is what its first use costs
+TOOL_MODULES = {
+    "compress_image": _IMAGE, "resize": _IMAGE, "edit": _IMAGE, "convert": _IMAGE,
+    "batch": ("engine.batch",),
+    "images_to_pdf": ("engine.image_pdf",),
+    "compress_pdf": ("engine.pdf_compress",),
+    "merge": ("engine.pdf", "engine.pdf_stream"),
+    "split": ("engine.pdf", "engine.pdf_split", "engine.page_ops"),
+    "notebook_to_pdf": ("engine.notebook", "nbformat", "nbconvert", "pdfkit"),
+    "merge_pptx": ("engine.pptx_merge",),
+}
+
+
+class Preloader:
+    """
+    Imports the modules of a tool the first time it is used rather than at startup, and
+    records how long that took per tool. Modules stay imported for the life of the process,
+    so later sessions and reruns find them warm. prewarm() loads the remaining tools on a
+    background thread, after the first page has been served.
+    """
+
+    def __init__(self, tools=TOOL_MODULES):
+        self.tools = dict(tools)
+        self.seconds = {}   # tool -> seconds its first load took
+        self.failed = {}    # tool -> import error (e.g. an optional dependency is not installed)
+        self._lock = threading.Lock()
+        self._prewarming = False
+
+    def load(self, tool):
+        """Import tool's modules if this is its first use; returns the seconds spent (0.0 when warm)."""
+        if tool in self.seconds or tool in self.failed: return 0.0
+        start = time.perf_counter()
+        try:
+            for name in self.tools.get(tool, ()): importlib.import_module(name)
+        except ImportError as e:
+            with self._lock: self.failed[tool] = str(e)
+            return 0.0
+        elapsed = time.perf_counter() - start
+        with self._lock: self.seconds.setdefault(tool, elapsed)
+        return elapsed
+
+    def prewarm(self):
+        """Start loading every tool on a daemon thread (once per process)."""
+        with self._lock:
+            if self._prewarming or not PREWARM: return
+            self._prewarming = True
+        threading.Thread(target=lambda: [self.load(tool) for tool in self.tools], name="docmint-prewarm", daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            return dict({f"{tool}_seconds": s for tool, s in self.seconds.items()},
+                        warm=len(self.seconds), failed=len(self.failed), tools=len(self.tools))
+
+
+_default_preloader = None
+_default_lock = threading.Lock()
+
+
+def get_preloader():
+    """Process-wide preloader shared by every session."""
+    global _default_preloader
+    with _default_lock:
+        if _default_preloader is None: _default_preloader = Preloader()
+    return _default_preloader
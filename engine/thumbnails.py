@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from .cache import cache_key
+from .common import as_stream
+
+THUMB_DIR = os.environ.get("DOCMINT_THUMB_DIR", os.path.join(tempfile.gettempdir(), "docmint-thumbs"))
+THUMB_DPI = int(os.environ.get("DOCMINT_THUMB_DPI", "40"))
+THUMB_WORKERS = int(os.environ.get("DOCMINT_THUMB_WORKERS", str(os.cpu_count() or 2)))
+THUMB_DISK_BYTES = int(os.environ.get("DOCMINT_THUMB_DISK_MB", "256")) * 1024 * 1024
+THUMB_TIMEOUT = int(os.environ.get("DOCMINT_THUMB_TIMEOUT", "60"))
+# Consecutive pages rendered by one pdftoppm call (it parses the document once per call)
+THUMB_BATCH = 4
+_CLEANUP_INTERVAL = 60
+_DOC_ID = re.compile(r"[0-9a-f]{40}")
+
+POPPLER_MISSING = "Page thumbnails need poppler-utils (pdftoppm). Install it and add it to PATH."
+
+
+def find_pdftoppm():
+    return shutil.which("pdftoppm")
+
+
+class ThumbnailIndex:
+    """
+    Low-DPI JPEG thumbnails of PDF pages, rendered with poppler's pdftoppm.
+
+    add() stores a document once under `root`, keyed by the hash of its bytes, so the same
+    file uploaded again (by any session) reuses every thumbnail already rendered. Pages are
+    only rendered when asked for: get() splits the missing ones into runs of consecutive
+    pages and renders the runs in parallel on `workers` threads, one pdftoppm process each.
+    Least recently used documents are deleted once the directory exceeds `disk_bytes`.
+    """
+
+    def __init__(self, root=THUMB_DIR, dpi=THUMB_DPI, workers=THUMB_WORKERS, disk_bytes=THUMB_DISK_BYTES, timeout=THUMB_TIMEOUT):
+        self.root = root
+        self.dpi = dpi
+        self.timeout = timeout
+        self.disk_bytes = disk_bytes
+        self.binary = find_pdftoppm()
+        os.makedirs(root, exist_ok=True)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="docmint-thumb")
+        self._lock = threading.Lock()
+        self._pending = {}   # (doc id, first page) -> future rendering that run
+        self._failed = set()  # (doc id, page) that pdftoppm could not render
+        self._last_cleanup = 0.0
+        self.counters = {"rendered": 0, "hits": 0, "failed": 0, "render_seconds": 0.0}
+
+    @property
+    def available(self):
+        return self.binary is not None
+
+    def _dir(self, doc_id):
+        return os.path.join(self.root, doc_id)
+
+    def _path(self, doc_id, page):
+        return os.path.join(self._dir(doc_id), f"p{page + 1}-{self.dpi}.jpg")
+
+    def add(self, src):
+        """Store a PDF (bytes, stream or path) and return its document id."""
+        if isinstance(src, (str, os.PathLike)):
+            with open(src, "rb") as fh: return self.add(fh)
+        self.cleanup()
+        doc_id = cache_key("document", [src])
+        pdf = os.path.join(self._dir(doc_id), "doc.pdf")
+        if not os.path.exists(pdf):
+            os.makedirs(self._dir(doc_id), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._dir(doc_id), suffix=".part")
+            with os.fdopen(fd, "wb") as fh:
+                if isinstance(src, (bytes, bytearray, memoryview)): fh.write(src)
+                else: shutil.copyfileobj(as_stream(src), fh, 1 << 20)
+            os.replace(tmp, pdf)
+        os.utime(self._dir(doc_id))
+        return doc_id
+
+    def has(self, doc_id):
+        return bool(_DOC_ID.fullmatch(doc_id)) and os.path.exists(os.path.join(self._dir(doc_id), "doc.pdf"))
+
+    def _render(self, doc_id, first, last):
+        """pdftoppm pages first..last (zero-based, inclusive) into per-page files."""
+        start, work = time.perf_counter(), None
+        try:
+            work = tempfile.mkdtemp(dir=self._dir(doc_id))
+            subprocess.run([self.binary, "-jpeg", "-jpegopt", "quality=70", "-r", str(self.dpi),
+                            "-f", str(first + 1), "-l", str(last + 1), os.path.join(self._dir(doc_id), "doc.pdf"),
+                            os.path.join(work, "p")], capture_output=True, timeout=self.timeout, check=False)
+            # Output is p-<page>.jpg, zero-padded to the width of the document's page count
+            for name in os.listdir(work):
+                m = re.fullmatch(r"p-(\d+)\.jpg", name)
+                if m: os.replace(os.path.join(work, name), self._path(doc_id, int(m.group(1)) - 1))
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        finally:
+            if work: shutil.rmtree(work, ignore_errors=True)
+        with self._lock:
+            for page in range(first, last + 1):
+                if os.path.exists(self._path(doc_id, page)): self.counters["rendered"] += 1
+                else:
+                    self._failed.add((doc_id, page))
+                    self.counters["failed"] += 1
+            self.counters["render_seconds"] += time.perf_counter() - start
+            self._pending.pop((doc_id, first), None)
+
+    def request(self, doc_id, pages):
+        """Start rendering the given zero-based pages that are not on disk yet; returns their futures."""
+        if not self.available or not self.has(doc_id): return []
+        os.utime(self._dir(doc_id))
+        wanted = set(pages)
+        missing = sorted(p for p in wanted if not os.path.exists(self._path(doc_id, p)) and (doc_id, p) not in self._failed)
+        runs, futures = [], []
+        for page in missing:
+            if runs and page == runs[-1][1] + 1 and page - runs[-1][0] < THUMB_BATCH: runs[-1][1] = page
+            else: runs.append([page, page])
+        with self._lock:
+            self.counters["hits"] += len(wanted) - len(missing)
+            for first, last in runs:
+                future = self._pending.get((doc_id, first))
+                if future is None:
+                    future = self._pending[(doc_id, first)] = self._pool.submit(self._render, doc_id, first, last)
+                futures.append(future)
+        return futures
+
+    def get(self, doc_id, pages, timeout=None):
+        """
+        {page: thumbnail path or None} for zero-based pages, rendering missing ones first.
+        Pages still rendering after timeout seconds (and pages that failed) map to None.
+        """
+        futures = self.request(doc_id, pages)
+        if futures: wait(futures, timeout)
+        out = {}
+        for page in pages:
+            path = self._path(doc_id, page)
+            out[page] = path if os.path.exists(path) else None
+        return out
+
+    def cleanup(self, force=False):
+        """Delete least recently used documents beyond disk_bytes (checked at most once a minute)."""
+        now = time.time()
+        if not force and now - self._last_cleanup < _CLEANUP_INTERVAL: return
+        self._last_cleanup = now
+        docs = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or not _DOC_ID.fullmatch(entry.name): continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            docs.append((entry.stat().st_mtime, size, entry.path))
+        total = sum(size for _, size, _ in docs)
+        for _, size, path in sorted(docs):
+            if total <= self.disk_bytes: break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, pending=len(self._pending), available=int(self.available))
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_thumbnail_index():
+    """Process-wide thumbnail index shared by every session."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None: _default_index = ThumbnailIndex()
+    return _default_index